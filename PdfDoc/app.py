@@ -9,21 +9,173 @@ Description: 基于Flask的PDF智能检索系统，集成文件管理、内容
 
 import os
 import sys
+import json
+import time
+import atexit
+import queue
 import asyncio
+import threading
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
 
 # Flask相关
-from flask import Flask, render_template, jsonify, request, send_from_directory
+from flask import Flask, Response, render_template, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
 # 导入路由模块
 from app.routes.FileRoutes import file_bp
 from app.routes.SearchRoutes import search_bp
 
+# 导入JSON响应工具
+from app.utils.responses import precompile_json, error_response
+
 # 导入环境检查模块
-from app.environment_check import main as environment_check
+from app.environment_check import EnvironmentChecker, close_all
+
+# ASGI服务器相关 (可选，未安装时回退到Flask内置服务器)
+try:
+    import uvicorn
+    from a2wsgi import WSGIMiddleware
+    ASGI_AVAILABLE = True
+except ImportError:
+    ASGI_AVAILABLE = False
+
+# JSON序列化加速 (可选，未安装时使用Flask默认的json实现)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 响应压缩 (可选，未安装时不压缩)
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
+
+# 静态文件服务 (可选，由Starlette在ASGI层直接提供，不经过Flask)
+try:
+    from starlette.applications import Starlette
+    from starlette.routing import Mount
+    from starlette.staticfiles import StaticFiles
+    STARLETTE_AVAILABLE = True
+except ImportError:
+    STARLETTE_AVAILABLE = False
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    基于orjson的JSON序列化提供器
+    datetime等类型交由Flask默认的default处理，保持与原有输出格式一致
+    """
+    
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if ORJSON_AVAILABLE else 0
+    
+    def _dumps_bytes(self, obj, indent: bool = False) -> bytes:
+        option = self.option | orjson.OPT_INDENT_2 if indent else self.option
+        return orjson.dumps(obj, default=self.default, option=option)
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return self._dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._dumps_bytes(obj, indent=indent) + b'\n',
+            mimetype=self.mimetype
+        )
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI层请求体大小限制中间件
+    Content-Length超出上限时在读取请求体之前直接返回413，Flask的MAX_CONTENT_LENGTH作为兜底
+    """
+    
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.body = json.dumps({
+            'success': False,
+            'message': f'上传文件过大，请确保文件小于{max_body_size // (1024 * 1024)}MB',
+            'code': 413
+        }, ensure_ascii=False).encode('utf-8')
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            for name, value in scope['headers']:
+                if name == b'content-length' and value.isdigit() and int(value) > self.max_body_size:
+                    await send({
+                        'type': 'http.response.start',
+                        'status': 413,
+                        'headers': [
+                            (b'content-type', b'application/json'),
+                            (b'content-length', str(len(self.body)).encode()),
+                            (b'connection', b'close')
+                        ]
+                    })
+                    await send({'type': 'http.response.body', 'body': self.body})
+                    return
+        
+        await self.app(scope, receive, send)
+
+
+# 系统信息 (启动时生成一次，请求时直接返回)
+_BOOT_MONOTONIC = time.monotonic()
+_BUILD_TIME = datetime.now()
+
+_SYSTEM_INFO_BODY = json.dumps({
+    'success': True,
+    'data': {
+        'name': 'PDF智能文件管理系统',
+        'version': '1.0.0',
+        'description': 'PDF文档智能检索和管理系统',
+        'features': [
+            'PDF文件上传和管理',
+            '智能内容提取',
+            '语义搜索',
+            'GraphRAG检索',
+            '流式对话',
+            '多模态内容分析'
+        ],
+        'technology_stack': {
+            'backend': 'Python Flask',
+            'frontend': 'HTML5 + CSS3 + JavaScript',
+            'database': 'MySQL + Milvus + Neo4j',
+            'ai_models': 'DeepSeek API + Local Models'
+        },
+        'build_time': _BUILD_TIME.isoformat()
+    }
+}, ensure_ascii=False).encode('utf-8')
+
+# 线程池大小 (每个worker进程独立)
+THREAD_POOL_SIZE = int(os.environ.get('THREAD_POOL_SIZE', '64'))
+
+# 模板上下文 (启动时间即构建时间)
+_TEMPLATE_CONTEXT = {
+    'system_name': 'PDF智能文件管理系统',
+    'system_version': '1.0.0',
+    'build_time': _BUILD_TIME.strftime('%Y-%m-%d %H:%M:%S')
+}
+
+_HEALTH_STATUS = {
+    'version': '1.0.0'
+}
+
+# 全局错误处理器返回的固定响应体，启动时序列化一次
+_ERR_NOT_FOUND = precompile_json({'success': False, 'message': '接口不存在', 'code': 404})
+_ERR_METHOD_NOT_ALLOWED = precompile_json({'success': False, 'message': '请求方法不允许', 'code': 405})
+_ERR_INTERNAL = precompile_json({'success': False, 'message': '服务器内部错误', 'code': 500})
+_ERR_TOO_LARGE = precompile_json({'success': False, 'message': '上传文件过大，请确保文件小于100MB', 'code': 413})
+_ERR_BAD_REQUEST = precompile_json({'success': False, 'message': '请求参数错误', 'code': 400})
 
 
 def create_app():
@@ -33,7 +185,11 @@ def create_app():
     # 创建Flask应用实例
     app = Flask(__name__, 
                 template_folder='templates/html',
-                static_folder='templates')
+                static_folder='templates',
+                static_url_path='/static')
+    
+    # 创建必要的目录 (直接以工厂函数启动时同样执行)
+    create_directories()
     
     # 应用配置
     configure_app(app)
@@ -47,6 +203,9 @@ def create_app():
     # 配置CORS
     configure_cors(app)
     
+    # 配置响应压缩
+    configure_compression(app)
+    
     # 注册错误处理器
     register_error_handlers(app)
     
@@ -59,26 +218,59 @@ def create_app():
     return app
 
 
+def create_asgi_app():
+    """
+    创建ASGI应用程序工厂函数
+    Flask应用经a2wsgi桥接为ASGI应用，由uvicorn (uvloop + httptools) 承载
+    """
+    app = create_app()
+    
+    # 注册路由
+    register_routes(app)
+    
+    # 后台环境检查
+    start_environment_check(app)
+    atexit.register(close_all)
+    
+    asgi_app = WSGIMiddleware(app, workers=THREAD_POOL_SIZE)
+    if STARLETTE_AVAILABLE:
+        # 静态文件由StaticFiles直接响应，其余请求交给Flask
+        asgi_app = Starlette(routes=[
+            Mount(app.static_url_path, app=StaticFiles(directory=app.static_folder, html=False)),
+            Mount('', app=asgi_app)
+        ])
+    
+    # 请求体超限时在ASGI层直接拒绝，不再读取请求体
+    return BodySizeLimitMiddleware(asgi_app, app.config['MAX_CONTENT_LENGTH'])
+
+
 def configure_app(app):
     """配置应用程序"""
     # 基础配置
     app.config['SECRET_KEY'] = 'pdf_ai_doc_secret_key_2024'
-    app.config['DEBUG'] = True
+    app.config['DEBUG'] = os.environ.get('FLASK_DEBUG', '0') == '1'
+    
+    # 模板配置 (仅调试模式下检查模板修改时间并自动重载)
+    app.config['TEMPLATES_AUTO_RELOAD'] = app.config['DEBUG']
+    app.jinja_options = {**app.jinja_options, 'cache_size': 400}
     
     # 文件上传配置
     app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB
     app.config['UPLOAD_FOLDER'] = './uploads'
     
-    # JSON配置
-    app.config['JSON_AS_ASCII'] = False
-    app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
+    # JSON配置 (Flask 2.2+ 通过 app.json 配置，紧凑输出且不转义中文)
+    if ORJSON_AVAILABLE:
+        app.json = OrjsonProvider(app)
+    app.json.ensure_ascii = False
+    app.json.compact = True
+    app.json.sort_keys = False
     
-    # 创建必要的目录
-    create_directories()
+    # 末尾斜杠不敏感，/api/file/list/ 直接匹配而不是重定向 (需在注册路由前设置)
+    app.url_map.strict_slashes = False
 
 
 def create_directories():
-    """创建必要的目录结构"""
+    """创建必要的目录结构 (已存在的目录不受影响)"""
     directories = [
         './uploads',
         './processed', 
@@ -102,25 +294,29 @@ def create_directories():
 
 def configure_logging(app):
     """配置日志系统"""
-    if not app.debug:
-        # 生产环境日志配置
-        log_dir = Path('./logs')
-        log_dir.mkdir(exist_ok=True)
-        
-        # 文件处理器
-        file_handler = logging.FileHandler(log_dir / 'app.log', encoding='utf-8')
-        file_handler.setLevel(logging.INFO)
-        
-        # 日志格式
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        file_handler.setFormatter(formatter)
-        
-        # 添加到应用日志器
-        app.logger.addHandler(file_handler)
-        app.logger.setLevel(logging.INFO)
-        app.logger.info('PDF智能文件管理系统启动')
+    log_dir = Path('./logs')
+    log_dir.mkdir(exist_ok=True)
+    
+    # 文件处理器
+    file_handler = logging.FileHandler(log_dir / 'app.log', encoding='utf-8')
+    file_handler.setLevel(logging.INFO)
+    
+    # 日志格式
+    formatter = logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    file_handler.setFormatter(formatter)
+    
+    # 请求线程只负责入队，由后台线程统一写入磁盘，避免阻塞请求
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # 添加到应用日志器
+    app.logger.addHandler(QueueHandler(log_queue))
+    app.logger.setLevel(logging.INFO)
+    app.logger.info('PDF智能文件管理系统启动')
 
 
 def register_blueprints(app):
@@ -139,12 +335,30 @@ def configure_cors(app):
     CORS(app, resources={
         r"/api/*": {
             "origins": ["*"],
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization", "Content-Range", "Upload-Offset", "X-Filename"],
+            "expose_headers": ["Location", "Upload-Offset", "Upload-Length"],
+            "max_age": 86400  # 预检请求缓存24小时
         }
     })
 
 
+def configure_compression(app):
+    """
+    配置JSON响应压缩
+    聊天历史、搜索统计等接口返回的JSON重复度高，按客户端的Accept-Encoding以br/gzip压缩；
+    流式响应 (SSE) 不压缩，避免压缩器缓冲导致事件延迟送达
+    """
+    if not COMPRESS_AVAILABLE:
+        return
+    app.config['COMPRESS_MIMETYPES'] = ['application/json']
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_LEVEL'] = 4
+    app.config['COMPRESS_BR_LEVEL'] = 4
+    app.config['COMPRESS_STREAMS'] = False
+    Compress(app)
+
+
 def register_error_handlers(app):
     """注册错误处理器"""
     
@@ -152,44 +366,35 @@ def register_error_handlers(app):
     def not_found_error(error):
         """404错误处理"""
         if request.path.startswith('/api/'):
-            return jsonify({
-                'success': False,
-                'message': '接口不存在',
-                'code': 404
-            }), 404
+            return error_response(_ERR_NOT_FOUND, 404)
         else:
-            return render_template('index.html'), 200  # SPA应用，统一返回index.html
+            return render_index(app), 200  # SPA应用，统一返回index.html
+    
+    @app.errorhandler(405)
+    def method_not_allowed_error(error):
+        """405错误处理"""
+        if request.path.startswith('/api/'):
+            return error_response(_ERR_METHOD_NOT_ALLOWED, 405)
+        return error
     
     @app.errorhandler(500)
     def internal_error(error):
         """500错误处理"""
-        app.logger.error(f'服务器内部错误: {error}')
+        app.logger.error('服务器内部错误: %s', error)
         if request.path.startswith('/api/'):
-            return jsonify({
-                'success': False,
-                'message': '服务器内部错误',
-                'code': 500
-            }), 500
+            return error_response(_ERR_INTERNAL, 500)
         else:
-            return render_template('index.html'), 200
+            return render_index(app), 200
     
     @app.errorhandler(413)
     def request_entity_too_large(error):
         """文件过大错误处理"""
-        return jsonify({
-            'success': False,
-            'message': '上传文件过大，请确保文件小于100MB',
-            'code': 413
-        }), 413
+        return error_response(_ERR_TOO_LARGE, 413)
     
     @app.errorhandler(400)
     def bad_request_error(error):
         """400错误处理"""
-        return jsonify({
-            'success': False,
-            'message': '请求参数错误',
-            'code': 400
-        }), 400
+        return error_response(_ERR_BAD_REQUEST, 400)
 
 
 def register_context_processors(app):
@@ -198,11 +403,7 @@ def register_context_processors(app):
     @app.context_processor
     def inject_system_info():
         """注入系统信息到模板上下文"""
-        return {
-            'system_name': 'PDF智能文件管理系统',
-            'system_version': '1.0.0',
-            'build_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
+        return _TEMPLATE_CONTEXT
 
 
 def register_before_first_request(app):
@@ -211,9 +412,60 @@ def register_before_first_request(app):
     # 改为在应用创建时直接执行初始化任务
     app.logger.info('执行应用初始化')
     
-    # 这里可以添加一些初始化任务
-    # 比如检查数据库连接、初始化缓存等
-    pass
+    # 预编译模板，避免首个请求及404/500回退时才解析
+    app.jinja_env.get_template('index.html')
+    
+    # 非调试模式下预先渲染首页，首页及SPA回退直接返回渲染结果
+    if not app.debug:
+        with app.test_request_context('/'):
+            app.config['INDEX_HTML'] = render_template('index.html').encode('utf-8')
+
+
+def render_index(app):
+    """返回SPA首页 (优先使用启动时预渲染的页面)"""
+    index_html = app.config.get('INDEX_HTML')
+    if index_html is None:
+        return render_template('index.html')
+    return Response(index_html, mimetype='text/html')
+
+
+def start_environment_check(app):
+    """
+    在后台线程中执行环境检查，不阻塞服务启动
+    检查结果写入 app.config['ENV_STATUS']，由 /health 接口读取
+    """
+    if os.environ.get('SKIP_ENV_CHECK', '0') == '1':
+        app.config['ENV_STATUS'] = {}
+        app.logger.info('已跳过环境检查')
+        return
+    
+    app.config['ENV_STATUS'] = None
+    
+    def run_checks():
+        # 使用独立事件循环，阻塞的检查项由检查器自带的线程池执行
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        checker = None
+        try:
+            checker = EnvironmentChecker()
+            results = loop.run_until_complete(checker.check_all_components())
+            app.config['ENV_STATUS'] = dict(results)
+            
+            if all(results.values()):
+                app.logger.info('环境检查通过')
+            else:
+                failed = [name for name, ok in results.items() if not ok]
+                app.logger.warning(f'环境检查未通过的组件: {failed}，详见 ./logs/environment_check.log')
+        except Exception as e:
+            app.config['ENV_STATUS'] = {'environment_check': False}
+            app.logger.error(f'环境检查过程中发生错误: {e}')
+        finally:
+            if checker is not None:
+                loop.run_until_complete(checker.close())
+            asyncio.set_event_loop(None)
+            loop.close()
+    
+    threading.Thread(target=run_checks, name='environment-check', daemon=True).start()
 
 
 # 路由定义
@@ -223,49 +475,37 @@ def register_routes(app):
     @app.route('/')
     def index():
         """主页路由"""
-        return render_template('index.html')
+        return render_index(app)
     
     @app.route('/health')
     def health_check():
         """健康检查接口"""
+        env_status = app.config.get('ENV_STATUS')
+        if env_status is None:
+            status = 'checking'
+        elif all(env_status.values()):
+            status = 'healthy'
+        else:
+            status = 'degraded'
+        
         return jsonify({
-            'status': 'healthy',
-            'timestamp': datetime.now().isoformat(),
-            'version': '1.0.0'
+            **_HEALTH_STATUS,
+            'status': status,
+            'components': env_status,
+            'uptime': round(time.monotonic() - _BOOT_MONOTONIC, 3)
         })
     
     @app.route('/api/system/info')
     def system_info():
         """系统信息接口"""
-        return jsonify({
-            'success': True,
-            'data': {
-                'name': 'PDF智能文件管理系统',
-                'version': '1.0.0',
-                'description': 'PDF文档智能检索和管理系统',
-                'features': [
-                    'PDF文件上传和管理',
-                    '智能内容提取',
-                    '语义搜索',
-                    'GraphRAG检索',
-                    '流式对话',
-                    '多模态内容分析'
-                ],
-                'technology_stack': {
-                    'backend': 'Python Flask',
-                    'frontend': 'HTML5 + CSS3 + JavaScript',
-                    'database': 'MySQL + Milvus + Neo4j',
-                    'ai_models': 'DeepSeek API + Local Models'
-                },
-                'build_time': datetime.now().isoformat()
-            }
-        })
+        return Response(
+            _SYSTEM_INFO_BODY,
+            mimetype='application/json',
+            headers={'Cache-Control': 'public, max-age=60'}
+        )
     
-    # 静态文件路由
-    @app.route('/static/<path:filename>')
-    def static_files(filename):
-        """静态文件服务"""
-        return send_from_directory(app.static_folder, filename)
+    # 路由注册完毕后立即编译路由匹配状态机，避免首个请求时才构建
+    app.url_map.update()
 
 
 def main():
@@ -276,37 +516,11 @@ def main():
     print("启动时间:", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
     print("="*60)
     
-    # 检查是否跳过环境检查
-    skip_env_check = os.environ.get('SKIP_ENV_CHECK', '0') == '1'
-    
-    if not skip_env_check and not os.environ.get('WERKZEUG_RUN_MAIN'):
-        # 环境检查 (仅在主进程执行，避免重载器重复执行)
-        print("正在进行环境检查...")
-        try:
-            # 运行环境检查
-            environment_success = asyncio.run(environment_check())
-            
-            if not environment_success:
-                print("❌ 环境检查失败，部分功能可能无法正常使用")
-                print("请检查日志文件 ./logs/environment_check.log 获取详细信息")
-                print("⚠️  自动继续启动系统...")
-            else:
-                print("✅ 环境检查通过")
-        
-        except KeyboardInterrupt:
-            print("\n系统启动已取消")
-            return
-        except Exception as e:
-            print(f"❌ 环境检查过程中发生错误: {e}")
-            print("⚠️  自动继续启动系统...")
-    else:
+    if os.environ.get('SKIP_ENV_CHECK', '0') == '1':
         print("⚠️  已跳过环境检查")
-    
-    # 创建Flask应用
-    app = create_app()
-    
-    # 注册路由
-    register_routes(app)
+    else:
+        print("环境检查将在服务启动后于后台执行，结果见 /health 接口")
+        print("详细信息见日志文件 ./logs/environment_check.log")
     
     print("\n🚀 正在启动Web服务器...")
     print("访问地址: http://localhost:5001")
@@ -319,16 +533,43 @@ def main():
         # 从环境变量获取配置
         host = os.environ.get('FLASK_HOST', '0.0.0.0')
         port = int(os.environ.get('FLASK_PORT', '5001'))
-        debug = os.environ.get('FLASK_DEBUG', '1') == '1'
+        debug = os.environ.get('FLASK_DEBUG', '0') == '1'
         
-        # 启动Flask应用
-        app.run(
-            host=host,
-            port=port,
-            debug=debug,
-            threaded=True,
-            use_reloader=True
-        )
+        if ASGI_AVAILABLE:
+            # 使用uvicorn启动ASGI应用 (auto会优先选用uvloop和httptools)
+            uvicorn.run(
+                f'{__name__}:create_asgi_app',
+                factory=True,
+                host=host,
+                port=port,
+                loop='auto',
+                http='auto',
+                h11_max_incomplete_event_size=1024 * 1024,
+                workers=int(os.environ.get('UVICORN_WORKERS', '1'))
+            )
+        else:
+            # 创建Flask应用
+            app = create_app()
+            
+            # 注册路由
+            register_routes(app)
+            
+            # 仅调试模式启用重载器 (重载器会让整个应用在父子两个进程中各初始化一次)
+            use_reloader = debug
+            
+            # 后台环境检查 (使用重载器时仅在子进程执行)
+            if not use_reloader or os.environ.get('WERKZEUG_RUN_MAIN'):
+                start_environment_check(app)
+            atexit.register(close_all)
+            
+            # 启动Flask应用
+            app.run(
+                host=host,
+                port=port,
+                debug=debug,
+                threaded=True,
+                use_reloader=use_reloader
+            )
     except KeyboardInterrupt:
         print("\n\n系统正在关闭...")
         print("感谢使用PDF智能文件管理系统！")
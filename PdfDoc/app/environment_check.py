@@ -8,41 +8,141 @@
 import os
 import sys
 import yaml
+import queue
+import atexit
 import logging
 import asyncio
+import functools
+import importlib
+import importlib.util
 import pymysql
-import redis
+from logging.handlers import QueueHandler, QueueListener
+from redis.asyncio import Redis as AsyncRedis, ConnectionPool as AsyncConnectionPool
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, Any, List, Tuple
 import requests
 import json
 import time
+import hashlib
+import threading
 from datetime import datetime
 
-# 第三方库导入
+# YAML解析优先使用libyaml的C实现
 try:
-    from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, utility
-    MILVUS_AVAILABLE = True
+    from yaml import CSafeLoader as YamlLoader
 except ImportError:
-    MILVUS_AVAILABLE = False
-    
-try:
-    from neo4j import GraphDatabase
-    NEO4J_AVAILABLE = True
-except ImportError:
-    NEO4J_AVAILABLE = False
+    from yaml import SafeLoader as YamlLoader
+
+# 第三方库导入
+# 重量级库 (pymilvus/neo4j/paddleocr/sentence_transformers) 仅检测是否安装，在对应检查中按需导入
+MILVUS_AVAILABLE = importlib.util.find_spec("pymilvus") is not None
+NEO4J_AVAILABLE = importlib.util.find_spec("neo4j") is not None
+PADDLEOCR_AVAILABLE = importlib.util.find_spec("paddleocr") is not None
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
 
 try:
-    import paddleocr
-    PADDLEOCR_AVAILABLE = True
+    import aiomysql
+    AIOMYSQL_AVAILABLE = True
 except ImportError:
-    PADDLEOCR_AVAILABLE = False
+    AIOMYSQL_AVAILABLE = False
 
 try:
-    import sentence_transformers
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
 except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
+    AIOHTTP_AVAILABLE = False
+
+
+@functools.lru_cache(maxsize=None)
+def _lazy_import(name: str):
+    """按需导入模块，同一进程内只导入一次"""
+    return importlib.import_module(name)
+
+
+@functools.lru_cache(maxsize=16)
+def _read_yaml(path: str, mtime_ns: int) -> Any:
+    """解析YAML配置文件，按 (路径, 修改时间) 缓存，文件未修改时直接复用解析结果"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=YamlLoader)
+
+
+# 进程内共享的Neo4j驱动 (环境检查与业务服务共用同一个连接池)
+_neo4j_driver = None
+_neo4j_driver_lock = threading.Lock()
+
+
+def get_neo4j_driver(neo4j_config: Dict[str, Any]):
+    """获取进程内共享的Neo4j驱动，首次调用时创建"""
+    global _neo4j_driver
+    with _neo4j_driver_lock:
+        if _neo4j_driver is None:
+            neo4j = _lazy_import("neo4j")
+            _neo4j_driver = neo4j.GraphDatabase.driver(
+                neo4j_config.get('uri', 'bolt://localhost:7687'),
+                auth=(neo4j_config.get('username', 'neo4j'), neo4j_config.get('password', 'password')),
+                max_connection_pool_size=50,
+                connection_acquisition_timeout=10
+            )
+        return _neo4j_driver
+
+
+def close_all():
+    """关闭进程内共享的Milvus连接和Neo4j驱动 (进程退出时调用)"""
+    global _neo4j_driver
+    with _neo4j_driver_lock:
+        if _neo4j_driver is not None:
+            _neo4j_driver.close()
+            _neo4j_driver = None
+            
+    if "pymilvus" in sys.modules:
+        sys.modules["pymilvus"].connections.disconnect("default")
+
+
+# 嵌入模型冒烟测试文本 (一次批量编码)
+EMBEDDING_PROBE_TEXTS = ["这是一个测试文本"] * 8
+
+# 同时下载的候选嵌入模型数量
+EMBEDDING_DOWNLOAD_CONCURRENCY = 3
+
+
+@functools.lru_cache(maxsize=2)
+def _load_st(model_path: str):
+    """加载SentenceTransformer模型，同一路径在进程内只反序列化一次"""
+    return _lazy_import("sentence_transformers").SentenceTransformer(model_path)
+
+
+# Neo4j约束和索引定义 (unique为True时创建唯一约束，否则创建普通索引)
+NEO4J_SCHEMA = [
+    {"name": "entity_id", "label": "Entity", "prop": "id", "unique": True},
+    {"name": "document_id", "label": "Document", "prop": "id", "unique": True},
+    {"name": "file_id", "label": "File", "prop": "id", "unique": True},
+    {"name": "entity_name_index", "label": "Entity", "prop": "name", "unique": False},
+    {"name": "entity_type_index", "label": "Entity", "prop": "type", "unique": False},
+    {"name": "document_page_index", "label": "Document", "prop": "page_number", "unique": False},
+]
+
+
+def _neo4j_schema_statement(row: Dict[str, Any]) -> str:
+    """根据约束/索引定义生成DDL语句 (Neo4j不支持对DDL中的标签和属性名使用参数)"""
+    if row["unique"]:
+        return (f"CREATE CONSTRAINT {row['name']} IF NOT EXISTS "
+                f"FOR (n:{row['label']}) REQUIRE n.{row['prop']} IS UNIQUE")
+    return f"CREATE INDEX {row['name']} IF NOT EXISTS FOR (n:{row['label']}) ON (n.{row['prop']})"
+
+
+# 单项检查默认超时时间（秒）
+DEFAULT_CHECK_TIMEOUT = 30
+
+# 检查线程池大小 (与检查项数量一致，每项检查最多占用一个线程)
+CHECK_WORKERS = 9
+
+# 检查结果缓存键前缀
+CACHE_KEY_PREFIX = "envcheck:v1"
+
+# 本地检查结果快照 (配置文件指纹未变化且在有效期内时跳过检查，不依赖Redis)
+FINGERPRINT_FILE = Path("./logs/.envcheck_fingerprint.json")
+FINGERPRINT_TTL = 300
 
 
 class EnvironmentChecker:
@@ -51,12 +151,19 @@ class EnvironmentChecker:
     def __init__(self, config_dir: str = "./config"):
         self.config_dir = Path(config_dir)
         self.logger = self._setup_logger()
+        self._events = []
+        self._executor = ThreadPoolExecutor(max_workers=CHECK_WORKERS, thread_name_prefix="envcheck")
+        self._fingerprint = {}
         self.configs = self._load_configs()
         self.check_results = {}
+        self._http = None
+        self._redis_pool = None
         
     def _setup_logger(self) -> logging.Logger:
-        """设置日志器"""
+        """设置日志器 (进程内只添加一次处理器，重复创建检查器时直接复用)"""
         logger = logging.getLogger("environment_checker")
+        if logger.handlers:
+            return logger
         logger.setLevel(logging.INFO)
         
         # 创建日志目录
@@ -76,54 +183,133 @@ class EnvironmentChecker:
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
         
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        # 检查过程只负责入队，由后台线程统一写入文件和控制台，避免阻塞事件循环
+        log_queue = queue.Queue(-1)
+        listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        
+        logger.addHandler(QueueHandler(log_queue))
         
         return logger
         
+    def _event(self, msg: str, level: int = logging.INFO):
+        """记录检查过程事件，暂存在内存中，由 _log_check_summary 统一写入日志"""
+        if self.logger.isEnabledFor(level):
+            self._events.append({
+                "ts": round(time.time(), 3),
+                "level": logging.getLevelName(level),
+                "msg": msg
+            })
+        
     def _load_configs(self) -> Dict[str, Any]:
-        """加载配置文件"""
+        """加载配置文件 (一次扫描配置目录，再并行读取解析)"""
         configs = {}
         config_files = ['config.yaml', 'db.yaml', 'model.yaml', 'prompt.yaml']
         
+        try:
+            with os.scandir(self.config_dir) as entries:
+                present = {entry.name: entry for entry in entries if entry.name in config_files}
+        except FileNotFoundError:
+            present = {}
+            
         for config_file in config_files:
-            config_path = self.config_dir / config_file
-            if config_path.exists():
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    configs[config_file.split('.')[0]] = yaml.safe_load(f)
-                self.logger.info(f"已加载配置文件: {config_file}")
-            else:
+            if config_file not in present:
                 self.logger.error(f"配置文件不存在: {config_file}")
+                continue
+            stat = present[config_file].stat()
+            self._fingerprint[config_file] = [stat.st_mtime_ns, stat.st_size]
+            
+        loaded = [name for name in config_files if name in self._fingerprint]
+        parsed = self._executor.map(
+            lambda name: _read_yaml(present[name].path, self._fingerprint[name][0]),
+            loaded
+        )
+        for config_file, config in zip(loaded, parsed):
+            configs[config_file.split('.')[0]] = config
+            self._event(f"已加载配置文件: {config_file}")
                 
         return configs
         
+    async def _to_thread(self, func, *args):
+        """在检查器专用线程池中执行阻塞的同步检查，避免阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+        
+    def _get_http_session(self) -> "aiohttp.ClientSession":
+        """获取复用keep-alive连接的HTTP会话 (需在事件循环内调用)"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=30, ttl_dns_cache=300)
+            )
+        return self._http
+        
+    async def close(self):
+        """释放检查器持有的连接资源"""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+        
+        if self._redis_pool is not None:
+            await self._redis_pool.disconnect()
+        self._redis_pool = None
+        
+        # 超时的检查可能仍在线程中运行，不等待其结束
+        self._executor.shutdown(wait=False)
+        
+    async def _bounded(self, coro, name: str, timeout: float) -> bool:
+        """为单项检查设置超时，超时视为检查失败"""
+        try:
+            return await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            self.logger.error(f"✗ {name} 检查超时 ({timeout}s)")
+            return False
+        
     async def check_all_components(self) -> Dict[str, bool]:
         """检查所有组件"""
-        self.logger.info("开始环境检查...")
+        self._event("开始环境检查...")
+        
+        # 配置文件未修改且本地快照仍在有效期内时，直接复用快照结果
+        snapshot_results = self._load_snapshot()
+        if snapshot_results:
+            self._event("配置文件未修改，使用本地环境检查快照")
+            self.check_results = snapshot_results
+            self._log_check_summary()
+            return self.check_results
+        
+        # 配置未变化且近期检查全部通过时，直接复用缓存结果
+        cache_key = self._cache_key()
+        cached_results = await self._load_cached_results(cache_key)
+        if cached_results:
+            self._event("配置未变化，使用缓存的环境检查结果")
+            self.check_results = cached_results
+            self._log_check_summary()
+            return self.check_results
         
         # 检查任务列表
+        checks = [
+            ("directories", self._check_directories()),
+            ("mysql", self._check_mysql_connection()),
+            ("redis", self._check_redis_connection()),
+            ("milvus", self._check_milvus_connection()),
+            ("neo4j", self._check_neo4j_connection()),
+            ("deepseek_api", self._check_deepseek_api()),
+            ("embedding_model", self._check_embedding_model()),
+            ("ocr_model", self._check_ocr_model()),
+            ("dependencies", self._check_dependencies())
+        ]
+        
+        # 每项检查单独限时，避免某个依赖无响应时拖住整个启动流程
+        timeouts = self.configs.get('config', {}).get('environment_check', {}).get('timeouts', {})
+        check_names = [name for name, _ in checks]
         check_tasks = [
-            self._check_directories(),
-            self._check_mysql_connection(),
-            self._check_redis_connection(),
-            self._check_milvus_connection(),
-            self._check_neo4j_connection(),
-            self._check_deepseek_api(),
-            self._check_embedding_model(),
-            self._check_ocr_model(),
-            self._check_dependencies()
+            self._bounded(coro, name, timeouts.get(name, DEFAULT_CHECK_TIMEOUT))
+            for name, coro in checks
         ]
         
         # 并发执行检查任务
         results = await asyncio.gather(*check_tasks, return_exceptions=True)
         
-        # 处理检查结果
-        check_names = [
-            "directories", "mysql", "redis", "milvus", 
-            "neo4j", "deepseek_api", "embedding_model", 
-            "ocr_model", "dependencies"
-        ]
-        
         for i, result in enumerate(results):
             if isinstance(result, Exception):
                 self.check_results[check_names[i]] = False
@@ -132,11 +318,95 @@ class EnvironmentChecker:
                 self.check_results[check_names[i]] = result
                 
         self._log_check_summary()
+        self._store_snapshot()
+        await self._store_cached_results(cache_key)
         return self.check_results
         
+    def _load_snapshot(self) -> Dict[str, bool]:
+        """读取本地检查结果快照，指纹不一致、已过期或存在失败项时返回空字典"""
+        try:
+            with open(FINGERPRINT_FILE, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return {}
+            
+        results = snapshot.get('results') or {}
+        if (snapshot.get('fingerprint') != self._fingerprint
+                or time.time() - snapshot.get('ts', 0) >= FINGERPRINT_TTL
+                or not all(results.values())):
+            return {}
+        return results
+        
+    def _store_snapshot(self):
+        """保存本地检查结果快照，仅在全部通过时保存，否则删除旧快照"""
+        try:
+            if not all(self.check_results.values()):
+                FINGERPRINT_FILE.unlink()
+                return
+                
+            tmp_path = FINGERPRINT_FILE.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'fingerprint': self._fingerprint,
+                    'ts': time.time(),
+                    'results': self.check_results
+                }, f)
+            os.replace(tmp_path, FINGERPRINT_FILE)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self._event(f"写入本地环境检查快照失败: {e}", logging.DEBUG)
+        
+    def _cache_settings(self) -> Dict[str, Any]:
+        """获取检查结果缓存配置"""
+        return self.configs.get('config', {}).get('environment_check', {}).get('cache', {})
+        
+    def _cache_key(self) -> str:
+        """根据当前配置内容生成缓存键，配置变化后缓存自动失效"""
+        digest = hashlib.sha1(yaml.safe_dump(self.configs, sort_keys=True).encode('utf-8')).hexdigest()
+        return f"{CACHE_KEY_PREFIX}:{digest}"
+        
+    async def _load_cached_results(self, cache_key: str) -> Dict[str, bool]:
+        """读取缓存的检查结果，缓存不可用时返回空字典"""
+        if not self._cache_settings().get('enabled', False):
+            return {}
+        try:
+            cached = await self._redis_client().get(cache_key)
+            return json.loads(cached) if cached else {}
+        except Exception as e:
+            self._event(f"读取环境检查缓存失败: {e}", logging.DEBUG)
+            return {}
+            
+    async def _store_cached_results(self, cache_key: str):
+        """
+        缓存检查结果
+        连续全部通过时TTL从min_ttl开始倍增至max_ttl，任一组件失败则清除缓存并重置
+        """
+        cache_settings = self._cache_settings()
+        if not cache_settings.get('enabled', False):
+            return
+        try:
+            client = self._redis_client()
+            streak_key = f"{cache_key}:streak"
+            
+            if not all(self.check_results.values()):
+                await client.delete(cache_key, streak_key)
+                return
+                
+            streak = await client.incr(streak_key)
+            await client.expire(streak_key, 86400)
+            
+            min_ttl = int(cache_settings.get('min_ttl', 60))
+            max_ttl = int(cache_settings.get('max_ttl', 3600))
+            ttl = min(min_ttl * 2 ** (streak - 1), max_ttl)
+            await client.setex(cache_key, ttl, json.dumps(self.check_results))
+            self._event(f"环境检查结果已缓存，有效期 {ttl}s")
+        except Exception as e:
+            self._event(f"写入环境检查缓存失败: {e}", logging.DEBUG)
+        
     async def _check_directories(self) -> bool:
         """检查目录结构"""
-        self.logger.info("检查目录结构...")
+        self._event("检查目录结构...")
         
         required_dirs = [
             "./uploads", "./processed", "./temp", "./logs", 
@@ -146,21 +416,65 @@ class EnvironmentChecker:
             "./models/image", "./models/text"
         ]
         
-        for dir_path in required_dirs:
-            path = Path(dir_path)
-            if not path.exists():
-                path.mkdir(parents=True, exist_ok=True)
-                self.logger.info(f"创建目录: {dir_path}")
-            else:
-                self.logger.debug(f"目录已存在: {dir_path}")
+        # 只需创建叶子目录，os.makedirs会顺带创建其上级目录
+        leaf_dirs = [
+            d for d in required_dirs
+            if not any(other.startswith(d + "/") for other in required_dirs)
+        ]
+        
+        for dir_path in leaf_dirs:
+            try:
+                os.makedirs(dir_path)
+                self._event(f"创建目录: {dir_path}")
+            except FileExistsError:
+                self._event(f"目录已存在: {dir_path}", logging.DEBUG)
                 
-        self.logger.info("✓ 目录结构检查完成")
+        self._event("✓ 目录结构检查完成")
         return True
         
     async def _check_mysql_connection(self) -> bool:
         """检查MySQL连接"""
-        self.logger.info("检查MySQL数据库连接...")
+        self._event("检查MySQL数据库连接...")
+        
+        if not AIOMYSQL_AVAILABLE:
+            return await self._to_thread(self._mysql_sync)
         
+        try:
+            db_config = self.configs.get('db', {}).get('mysql', {})
+            connection = await aiomysql.connect(
+                host=db_config.get('host', 'localhost'),
+                port=db_config.get('port', 3306),
+                user=db_config.get('username', 'root'),
+                password=db_config.get('password', ''),
+                charset=db_config.get('charset', 'utf8mb4'),
+                autocommit=True
+            )
+            
+            try:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("SELECT VERSION()")
+                    version = await cursor.fetchone()
+                    self._event(f"✓ MySQL连接成功，版本: {version[0]}")
+                    
+                    # 检查数据库是否存在
+                    database_name = db_config.get('database', 'pdf_ai_doc')
+                    await cursor.execute("SHOW DATABASES LIKE %s", (database_name,))
+                    result = await cursor.fetchone()
+                    if not result:
+                        self.logger.warning(f"数据库 {database_name} 不存在，需要手动执行 db.sql 脚本")
+                    else:
+                        self._event(f"✓ 数据库 {database_name} 已存在")
+            finally:
+                connection.close()
+                
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"✗ MySQL连接失败: {e}")
+            return False
+        
+    def _mysql_sync(self) -> bool:
+        """MySQL连接检查 (同步实现，aiomysql不可用时在线程池中执行)"""
         try:
             db_config = self.configs.get('db', {}).get('mysql', {})
             connection = pymysql.connect(
@@ -174,17 +488,17 @@ class EnvironmentChecker:
             with connection.cursor() as cursor:
                 cursor.execute("SELECT VERSION()")
                 version = cursor.fetchone()
-                self.logger.info(f"✓ MySQL连接成功，版本: {version[0]}")
+                self._event(f"✓ MySQL连接成功，版本: {version[0]}")
                 
             # 检查数据库是否存在
             database_name = db_config.get('database', 'pdf_ai_doc')
             with connection.cursor() as cursor:
-                cursor.execute(f"SHOW DATABASES LIKE '{database_name}'")
+                cursor.execute("SHOW DATABASES LIKE %s", (database_name,))
                 result = cursor.fetchone()
                 if not result:
                     self.logger.warning(f"数据库 {database_name} 不存在，需要手动执行 db.sql 脚本")
                 else:
-                    self.logger.info(f"✓ 数据库 {database_name} 已存在")
+                    self._event(f"✓ 数据库 {database_name} 已存在")
                     
             connection.close()
             return True
@@ -193,11 +507,9 @@ class EnvironmentChecker:
             self.logger.error(f"✗ MySQL连接失败: {e}")
             return False
             
-    async def _check_redis_connection(self) -> bool:
-        """检查Redis连接"""
-        self.logger.info("检查Redis连接...")
-        
-        try:
+    def _redis_client(self) -> AsyncRedis:
+        """获取基于共享连接池的异步Redis客户端 (环境检查与结果缓存共用)"""
+        if self._redis_pool is None:
             # 从db.yaml中读取Redis配置
             redis_config = self.configs.get('db', {}).get('redis', {})
             
@@ -205,24 +517,28 @@ class EnvironmentChecker:
             if not redis_config:
                 redis_config = self.configs.get('config', {}).get('cache', {})
             
-            host = redis_config.get('host', 'localhost')
-            port = redis_config.get('port', 6379)
-            password = redis_config.get('password', None)
-            db = redis_config.get('db', 0)
-            
-            # 创建Redis连接
-            redis_client = redis.Redis(
-                host=host,
-                port=port,
-                password=password,
-                db=db,
-                decode_responses=True
+            self._redis_pool = AsyncConnectionPool(
+                host=redis_config.get('host', 'localhost'),
+                port=redis_config.get('port', 6379),
+                password=redis_config.get('password', None),
+                db=redis_config.get('db', 0),
+                socket_connect_timeout=2,
+                # 读写超时：Redis已接受连接但不响应时，结果缓存的读写不能阻塞整个检查
+                socket_timeout=1,
+                max_connections=16
             )
+        return AsyncRedis(connection_pool=self._redis_pool)
+        
+    async def _check_redis_connection(self) -> bool:
+        """检查Redis连接"""
+        self._event("检查Redis连接...")
+        
+        try:
+            redis_client = self._redis_client()
             
-            # 测试连接
-            redis_client.ping()
-            info = redis_client.info()
-            self.logger.info(f"✓ Redis连接成功，版本: {info.get('redis_version', 'unknown')}")
+            # 只获取server段 (同时验证连接可用)，避免传输和解析完整的INFO输出
+            info = await redis_client.info("server")
+            self._event(f"✓ Redis连接成功，版本: {info.get('redis_version', 'unknown')}")
             return True
             
         except Exception as e:
@@ -235,31 +551,35 @@ class EnvironmentChecker:
             self.logger.error("✗ pymilvus 库未安装")
             return False
             
-        self.logger.info("检查Milvus向量数据库连接...")
+        self._event("检查Milvus向量数据库连接...")
+        return await self._to_thread(self._milvus_sync)
         
+    def _milvus_sync(self) -> bool:
+        """Milvus连接检查 (同步实现，在线程池中执行)"""
         try:
+            pymilvus = _lazy_import("pymilvus")
             milvus_config = self.configs.get('db', {}).get('milvus', {})
             host = milvus_config.get('host', '192.168.16.26')
             port = milvus_config.get('port', 19530)
             
             # 连接Milvus
-            connections.connect(
+            pymilvus.connections.connect(
                 alias="default",
                 host=host,
                 port=port
             )
             
             # 检查连接状态
-            if connections.has_connection("default"):
-                self.logger.info(f"✓ Milvus连接成功 ({host}:{port})")
+            if pymilvus.connections.has_connection("default"):
+                self._event(f"✓ Milvus连接成功 ({host}:{port})")
                 
                 # 检查集合是否存在
                 collection_name = milvus_config.get('collection', 'pdf_doc')
-                if utility.has_collection(collection_name):
-                    self.logger.info(f"✓ 集合 {collection_name} 已存在")
+                if pymilvus.utility.has_collection(collection_name):
+                    self._event(f"✓ 集合 {collection_name} 已存在")
                 else:
                     # 创建集合
-                    await self._create_milvus_collection(collection_name)
+                    self._create_milvus_collection(collection_name)
                     
                 return True
             else:
@@ -270,28 +590,30 @@ class EnvironmentChecker:
             self.logger.error(f"✗ Milvus连接失败: {e}")
             return False
             
-    async def _create_milvus_collection(self, collection_name: str):
+    def _create_milvus_collection(self, collection_name: str):
         """创建Milvus集合"""
         try:
+            pymilvus = _lazy_import("pymilvus")
+            
             # 定义字段
             fields = [
-                FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
-                FieldSchema(name="file_id", dtype=DataType.INT64),
-                FieldSchema(name="content_id", dtype=DataType.INT64),
-                FieldSchema(name="content_type", dtype=DataType.VARCHAR, max_length=50),
-                FieldSchema(name="page_number", dtype=DataType.INT64),
-                FieldSchema(name="text_content", dtype=DataType.VARCHAR, max_length=65535),
-                FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=768)
+                pymilvus.FieldSchema(name="id", dtype=pymilvus.DataType.INT64, is_primary=True, auto_id=True),
+                pymilvus.FieldSchema(name="file_id", dtype=pymilvus.DataType.INT64),
+                pymilvus.FieldSchema(name="content_id", dtype=pymilvus.DataType.INT64),
+                pymilvus.FieldSchema(name="content_type", dtype=pymilvus.DataType.VARCHAR, max_length=50),
+                pymilvus.FieldSchema(name="page_number", dtype=pymilvus.DataType.INT64),
+                pymilvus.FieldSchema(name="text_content", dtype=pymilvus.DataType.VARCHAR, max_length=65535),
+                pymilvus.FieldSchema(name="embedding", dtype=pymilvus.DataType.FLOAT_VECTOR, dim=768)
             ]
             
             # 创建集合模式
-            schema = CollectionSchema(
+            schema = pymilvus.CollectionSchema(
                 fields=fields,
                 description=f"PDF文档内容向量集合"
             )
             
             # 创建集合
-            collection = Collection(
+            collection = pymilvus.Collection(
                 name=collection_name,
                 schema=schema
             )
@@ -304,7 +626,7 @@ class EnvironmentChecker:
             }
             collection.create_index(field_name="embedding", index_params=index_params)
             
-            self.logger.info(f"✓ 创建Milvus集合: {collection_name}")
+            self._event(f"✓ 创建Milvus集合: {collection_name}")
             
         except Exception as e:
             self.logger.error(f"✗ 创建Milvus集合失败: {e}")
@@ -315,109 +637,107 @@ class EnvironmentChecker:
             self.logger.error("✗ neo4j 库未安装")
             return False
             
-        self.logger.info("检查Neo4j图数据库连接...")
+        self._event("检查Neo4j图数据库连接...")
+        return await self._to_thread(self._neo4j_sync)
         
+    def _neo4j_sync(self) -> bool:
+        """Neo4j连接检查 (同步实现，在线程池中执行；使用共享驱动，连接池可被业务服务复用)"""
         try:
-            neo4j_config = self.configs.get('db', {}).get('neo4j', {})
-            uri = neo4j_config.get('uri', 'bolt://localhost:7687')
-            username = neo4j_config.get('username', 'neo4j')
-            password = neo4j_config.get('password', 'password')
-            
-            driver = GraphDatabase.driver(uri, auth=(username, password))
+            driver = get_neo4j_driver(self.configs.get('db', {}).get('neo4j', {}))
             
             # 测试连接
             with driver.session() as session:
-                result = session.run("RETURN 1")
-                record = result.single()
+                record = session.run("RETURN 1").single()
                 if record and record[0] == 1:
-                    self.logger.info(f"✓ Neo4j连接成功")
+                    self._event(f"✓ Neo4j连接成功")
                     
                     # 检查约束和索引
-                    await self._setup_neo4j_constraints(session)
+                    self._setup_neo4j_constraints(session)
                     return True
                     
-            driver.close()
             return False
             
         except Exception as e:
             self.logger.error(f"✗ Neo4j连接失败: {e}")
             return False
             
-    async def _setup_neo4j_constraints(self, session):
-        """设置Neo4j约束和索引"""
+    def _setup_neo4j_constraints(self, session):
+        """设置Neo4j约束和索引 (先一次查询已有的结构，只在同一个写事务中创建缺失的部分)"""
         try:
-            # 创建节点约束
-            constraints = [
-                "CREATE CONSTRAINT entity_id IF NOT EXISTS FOR (e:Entity) REQUIRE e.id IS UNIQUE",
-                "CREATE CONSTRAINT document_id IF NOT EXISTS FOR (d:Document) REQUIRE d.id IS UNIQUE",
-                "CREATE CONSTRAINT file_id IF NOT EXISTS FOR (f:File) REQUIRE f.id IS UNIQUE"
-            ]
-            
-            for constraint in constraints:
-                try:
-                    session.run(constraint)
-                    self.logger.debug(f"创建约束: {constraint}")
-                except Exception as e:
-                    # 约束可能已存在，忽略错误
-                    pass
+            # 约束和索引分别查询名称 (owningConstraint 列仅Neo4j 5提供，4.4上会查询失败)
+            existing = set()
+            for query in ("SHOW CONSTRAINTS YIELD name", "SHOW INDEXES YIELD name"):
+                existing.update(record["name"] for record in session.run(query))
                     
-            # 创建索引
-            indexes = [
-                "CREATE INDEX entity_name_index IF NOT EXISTS FOR (e:Entity) ON (e.name)",
-                "CREATE INDEX entity_type_index IF NOT EXISTS FOR (e:Entity) ON (e.type)",
-                "CREATE INDEX document_page_index IF NOT EXISTS FOR (d:Document) ON (d.page_number)"
+            statements = [
+                _neo4j_schema_statement(row) for row in NEO4J_SCHEMA
+                if row["name"] not in existing
             ]
-            
-            for index in indexes:
-                try:
-                    session.run(index)
-                    self.logger.debug(f"创建索引: {index}")
-                except Exception as e:
-                    # 索引可能已存在，忽略错误
-                    pass
+            if not statements:
+                self._event("✓ Neo4j约束和索引已存在")
+                return
+                
+            def create_schema(tx):
+                for statement in statements:
+                    tx.run(statement).consume()
+                    self._event(f"执行: {statement}", logging.DEBUG)
                     
-            self.logger.info("✓ Neo4j约束和索引设置完成")
+            session.execute_write(create_schema)
+            self._event(f"✓ Neo4j约束和索引设置完成，新建 {len(statements)} 项")
             
         except Exception as e:
             self.logger.error(f"设置Neo4j约束失败: {e}")
             
     async def _check_deepseek_api(self) -> bool:
         """检查DeepSeek API连接"""
-        self.logger.info("检查DeepSeek API连接...")
+        self._event("检查DeepSeek API连接...")
+        
+        if not AIOHTTP_AVAILABLE:
+            return await self._to_thread(self._deepseek_sync)
         
         try:
-            llm_config = self.configs.get('model', {}).get('llm', {})
-            api_key = llm_config.get('api_key')
-            base_url = llm_config.get('base_url')
+            request = self._build_deepseek_request()
+            if request is None:
+                return False
+            url, headers, test_data = request
             
-            if not api_key:
-                self.logger.error("✗ DeepSeek API密钥未配置")
+            session = self._get_http_session()
+            async with session.post(
+                url,
+                headers=headers,
+                json=test_data,
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                status = response.status
+            
+            if status == 200:
+                self._event("✓ DeepSeek API连接成功")
+                return True
+            else:
+                self.logger.error(f"✗ DeepSeek API连接失败: {status}")
                 return False
                 
-            # 测试API连接
-            headers = {
-                'Authorization': f'Bearer {api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            # 发送测试请求
-            test_data = {
-                "model": "deepseek-chat",
-                "messages": [
-                    {"role": "user", "content": "Hello"}
-                ],
-                "max_tokens": 10
-            }
+        except Exception as e:
+            self.logger.error(f"✗ DeepSeek API连接失败: {e}")
+            return False
+        
+    def _deepseek_sync(self) -> bool:
+        """DeepSeek API检查 (同步实现，aiohttp不可用时在线程池中执行)"""
+        try:
+            request = self._build_deepseek_request()
+            if request is None:
+                return False
+            url, headers, test_data = request
             
             response = requests.post(
-                f"{base_url}/chat/completions",
+                url,
                 headers=headers,
                 json=test_data,
                 timeout=10
             )
             
             if response.status_code == 200:
-                self.logger.info("✓ DeepSeek API连接成功")
+                self._event("✓ DeepSeek API连接成功")
                 return True
             else:
                 self.logger.error(f"✗ DeepSeek API连接失败: {response.status_code}")
@@ -427,10 +747,40 @@ class EnvironmentChecker:
             self.logger.error(f"✗ DeepSeek API连接失败: {e}")
             return False
             
+    def _build_deepseek_request(self):
+        """构造DeepSeek API测试请求，返回 (url, headers, data)，未配置密钥时返回None"""
+        llm_config = self.configs.get('model', {}).get('llm', {})
+        api_key = llm_config.get('api_key')
+        base_url = llm_config.get('base_url')
+        
+        if not api_key:
+            self.logger.error("✗ DeepSeek API密钥未配置")
+            return None
+            
+        # 测试API连接
+        headers = {
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json'
+        }
+        
+        # 发送测试请求
+        test_data = {
+            "model": "deepseek-chat",
+            "messages": [
+                {"role": "user", "content": "Hello"}
+            ],
+            "max_tokens": 10
+        }
+        
+        return f"{base_url}/chat/completions", headers, test_data
+            
     async def _check_embedding_model(self) -> bool:
         """检查嵌入模型"""
-        self.logger.info("检查嵌入模型...")
+        self._event("检查嵌入模型...")
+        return await self._to_thread(self._embedding_sync)
         
+    def _embedding_sync(self) -> bool:
+        """嵌入模型检查 (同步实现，在线程池中执行)"""
         try:
             model_config = self.configs.get('model', {}).get('embedding_model', {})
             model_path = model_config.get('model_path', './models/embedding/text-embedding-3-small')
@@ -441,30 +791,31 @@ class EnvironmentChecker:
             model_needs_download = False
             
             if not model_path_obj.exists():
-                self.logger.info(f"嵌入模型目录不存在: {model_path}")
+                self._event(f"嵌入模型目录不存在: {model_path}")
                 model_needs_download = True
             else:
                 # 检查模型目录是否包含有效的模型文件
                 model_files = ['config.json', 'pytorch_model.bin', 'tokenizer.json']
                 if not any((model_path_obj / file).exists() for file in model_files):
-                    self.logger.info(f"嵌入模型目录存在但缺少模型文件: {model_path}")
+                    self._event(f"嵌入模型目录存在但缺少模型文件: {model_path}")
                     model_needs_download = True
             
             # 如果需要下载模型
             if model_needs_download:
                 self.logger.info(f"开始自动下载嵌入模型到: {model_path}")
-                await self._download_embedding_model(model_path, model_config)
+                self._download_embedding_model(model_path, model_config)
             
             # 检查是否可以加载模型
             if SENTENCE_TRANSFORMERS_AVAILABLE:
                 try:
-                    from sentence_transformers import SentenceTransformer
-                    model = SentenceTransformer(str(model_path))
                     # 测试编码
-                    test_text = "这是一个测试文本"
-                    embedding = model.encode([test_text])
-                    if embedding.shape[1] == expected_vector_size:  # 检查向量维度
-                        self.logger.info(f"✓ 嵌入模型加载成功，向量维度: {embedding.shape[1]}")
+                    embedding = _load_st(str(model_path)).encode(
+                        EMBEDDING_PROBE_TEXTS,
+                        batch_size=len(EMBEDDING_PROBE_TEXTS),
+                        convert_to_numpy=True
+                    )
+                    if embedding.shape == (len(EMBEDDING_PROBE_TEXTS), expected_vector_size):  # 检查向量维度
+                        self._event(f"✓ 嵌入模型加载成功，向量维度: {embedding.shape[1]}")
                         return True
                     else:
                         self.logger.error(f"✗ 嵌入模型向量维度错误: {embedding.shape[1]}，期望: {expected_vector_size}")
@@ -480,7 +831,7 @@ class EnvironmentChecker:
             self.logger.error(f"✗ 嵌入模型检查失败: {e}")
             return False
             
-    async def _download_embedding_model(self, model_path: str, model_config: dict):
+    def _download_embedding_model(self, model_path: str, model_config: dict):
         """下载嵌入模型"""
         try:
             # 创建模型目录
@@ -496,38 +847,42 @@ class EnvironmentChecker:
             
             # 使用sentence-transformers下载模型
             if SENTENCE_TRANSFORMERS_AVAILABLE:
-                from sentence_transformers import SentenceTransformer
-                
-                # 尝试下载主模型
-                success = False
+                # 候选模型并发下载，采用最先完成且维度符合要求的模型
                 models_to_try = [huggingface_model] + [alt['name'] for alt in alternative_models]
+                winner = None
                 
-                for model_name in models_to_try:
-                    try:
-                        self.logger.info(f"尝试下载模型: {model_name}")
-                        model = SentenceTransformer(model_name)
-                        model.save(str(model_path))
-                        
-                        # 验证模型向量维度
-                        test_embedding = model.encode(["测试文本"])
-                        actual_vector_size = test_embedding.shape[1]
-                        
+                executor = ThreadPoolExecutor(
+                    max_workers=EMBEDDING_DOWNLOAD_CONCURRENCY,
+                    thread_name_prefix='embedding-download'
+                )
+                futures = {executor.submit(self._probe_embedding_candidate, name): name for name in models_to_try}
+                try:
+                    for future in as_completed(futures):
+                        model_name = futures[future]
+                        try:
+                            model, actual_vector_size = future.result()
+                        except Exception as e:
+                            self.logger.warning(f"下载模型 {model_name} 失败: {e}")
+                            continue
+                            
                         if actual_vector_size == expected_vector_size:
-                            self.logger.info(f"✓ 嵌入模型下载成功，向量维度: {actual_vector_size}")
-                            success = True
+                            self.logger.info(f"✓ 嵌入模型 {model_name} 下载成功，向量维度: {actual_vector_size}")
+                            winner = model
                             break
                         else:
                             self.logger.warning(f"模型 {model_name} 向量维度为 {actual_vector_size}，期望 {expected_vector_size}")
-                            # 如果维度不匹配，尝试下一个模型
-                            continue
-                            
-                    except Exception as e:
-                        self.logger.warning(f"下载模型 {model_name} 失败: {e}")
-                        continue
+                finally:
+                    # 取消尚未开始的候选下载
+                    for future in futures:
+                        future.cancel()
+                    executor.shutdown(wait=False)
                 
-                if not success:
+                if winner is None:
                     raise Exception(f"所有候选模型都无法满足 {expected_vector_size} 维度要求")
                     
+                # 只保存选中的模型
+                winner.save(str(model_path))
+                    
             else:
                 self.logger.error("✗ sentence_transformers 库未安装，无法下载模型")
                 raise Exception("sentence_transformers 库未安装")
@@ -540,10 +895,24 @@ class EnvironmentChecker:
                 f.write(f"Download failed at {datetime.now()}: {str(e)}")
             raise
             
+    def _probe_embedding_candidate(self, model_name: str):
+        """下载候选嵌入模型并返回 (模型, 向量维度)"""
+        self.logger.info(f"尝试下载模型: {model_name}")
+        model = _load_st(model_name)
+        test_embedding = model.encode(
+            EMBEDDING_PROBE_TEXTS,
+            batch_size=len(EMBEDDING_PROBE_TEXTS),
+            convert_to_numpy=True
+        )
+        return model, test_embedding.shape[1]
+        
     async def _check_ocr_model(self) -> bool:
         """检查OCR模型"""
-        self.logger.info("检查OCR模型...")
+        self._event("检查OCR模型...")
+        return await self._to_thread(self._ocr_sync)
         
+    def _ocr_sync(self) -> bool:
+        """OCR模型检查 (同步实现，在线程池中执行)"""
         try:
             if not PADDLEOCR_AVAILABLE:
                 self.logger.error("✗ paddleocr 库未安装")
@@ -565,13 +934,13 @@ class EnvironmentChecker:
                     
             if missing_models:
                 self.logger.info("OCR模型文件不存在，开始下载...")
-                await self._download_ocr_models(missing_models)
+                self._download_ocr_models(missing_models)
                 
             # 测试OCR模型初始化
             try:
                 # 简单的PaddleOCR初始化测试
                 # 实际使用时会在第一次调用时下载模型
-                self.logger.info("✓ OCR模型检查完成")
+                self._event("✓ OCR模型检查完成")
                 return True
                 
             except Exception as e:
@@ -582,7 +951,7 @@ class EnvironmentChecker:
             self.logger.error(f"✗ OCR模型检查失败: {e}")
             return False
             
-    async def _download_ocr_models(self, missing_models: List[str]):
+    def _download_ocr_models(self, missing_models: List[str]):
         """下载OCR模型"""
         try:
             self.logger.info("正在初始化PaddleOCR并下载必要的模型文件...")
@@ -597,7 +966,7 @@ class EnvironmentChecker:
                 self.logger.info(f"创建OCR模型目录: {model_dir}")
             
             # 初始化PaddleOCR会自动下载模型
-            import paddleocr
+            paddleocr = _lazy_import("paddleocr")
             
             # 配置PaddleOCR参数
             ocr_config = self.configs.get('model', {}).get('ocr_model', {})
@@ -613,9 +982,13 @@ class EnvironmentChecker:
                 show_log=True
             )
             
-            # 测试OCR功能
-            self.logger.info("测试OCR模型...")
-            test_result = ocr.ocr("test", cls=True)  # 使用一个简单的测试
+            # 使用内存中的空白小图预热一次检测/识别/方向分类模型，不读取任何文件
+            self.logger.info("预热OCR模型...")
+            warmup_image = _lazy_import("numpy").zeros((32, 32, 3), dtype="uint8")
+            try:
+                ocr.ocr(warmup_image, cls=True)
+            except Exception as e:
+                self.logger.warning(f"OCR模型预热失败: {e}")
             
             # 标记模型已就绪
             for model_dir in missing_models:
@@ -635,7 +1008,7 @@ class EnvironmentChecker:
             
     async def _check_dependencies(self) -> bool:
         """检查Python依赖"""
-        self.logger.info("检查Python依赖...")
+        self._event("检查Python依赖...")
         
         # 包名映射：(import_name, package_description)
         required_packages = [
@@ -655,7 +1028,7 @@ class EnvironmentChecker:
         for import_name, description in required_packages:
             try:
                 __import__(import_name)
-                self.logger.debug(f"✓ {import_name} ({description}) 已安装")
+                self._event(f"✓ {import_name} ({description}) 已安装", logging.DEBUG)
             except ImportError:
                 missing_packages.append(f"{import_name} ({description})")
                 self.logger.warning(f"✗ {import_name} ({description}) 未安装")
@@ -665,29 +1038,29 @@ class EnvironmentChecker:
             self.logger.info("请运行: pip install -r requirements.txt")
             return False
         else:
-            self.logger.info("✓ 所有必要依赖已安装")
+            self._event("✓ 所有必要依赖已安装")
             return True
             
     def _log_check_summary(self):
-        """记录检查总结"""
-        self.logger.info("\n" + "="*50)
-        self.logger.info("环境检查总结:")
-        self.logger.info("="*50)
+        """记录检查总结 (同时输出检查过程中暂存的事件)"""
+        all_passed = all(self.check_results.values())
         
-        all_passed = True
+        lines = ["", "="*50, "环境检查总结:", "="*50]
         for component, status in self.check_results.items():
             status_symbol = "✓" if status else "✗"
             status_text = "通过" if status else "失败"
-            self.logger.info(f"{status_symbol} {component}: {status_text}")
-            if not status:
-                all_passed = False
-                
-        self.logger.info("="*50)
+            lines.append(f"{status_symbol} {component}: {status_text}")
+        lines.append("="*50)
+        
+        events, self._events = self._events, []
+        self.logger.info(json.dumps({"events": events, "results": self.check_results}, ensure_ascii=False))
+        
         if all_passed:
-            self.logger.info("🎉 所有组件检查通过，系统可以启动！")
+            lines.append("🎉 所有组件检查通过，系统可以启动！")
+            self.logger.info("\n".join(lines))
         else:
-            self.logger.error("❌ 部分组件检查失败，请修复后重新启动系统")
-        self.logger.info("="*50)
+            lines.append("❌ 部分组件检查失败，请修复后重新启动系统")
+            self.logger.error("\n".join(lines))
         
         return all_passed
 
@@ -695,7 +1068,11 @@ class EnvironmentChecker:
 async def main():
     """主函数"""
     checker = EnvironmentChecker()
-    results = await checker.check_all_components()
+    try:
+        results = await checker.check_all_components()
+    finally:
+        await checker.close()
+        close_all()
     
     # 返回检查结果
     return all(results.values())
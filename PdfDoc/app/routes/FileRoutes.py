@@ -5,16 +5,22 @@
 处理文件管理相关的HTTP请求
 """
 
-import asyncio
+import os
+import re
 import logging
+import threading
 import time
-from flask import Blueprint, request, jsonify, current_app
+from urllib.parse import unquote
+from flask import Blueprint, request, current_app, url_for
 from werkzeug.utils import secure_filename
-from typing import Dict, Any
-import json
+from typing import Dict, Any, Optional, Tuple
 
 # 导入服务层
-from ..service.FileService import FileService
+from ..service.FileService import FileService, file_cache_scope
+from ..utils.async_runner import run_async
+from ..utils.limiter import UserLimiter
+from ..utils.progress import dumps_state, loads_state
+from ..utils.responses import json_response, error_response, precompile_json, json_body
 
 # 创建蓝图
 file_bp = Blueprint('file', __name__, url_prefix='/api/file')
@@ -22,103 +28,453 @@ file_bp = Blueprint('file', __name__, url_prefix='/api/file')
 # 初始化服务
 file_service = FileService()
 
+# 接口响应缓存（按用户划分作用域，文件变更或处理状态变化时整体失效）
+cache_settings = file_service.configs.get('config', {}).get('api_cache', {})
+response_cache = file_service.response_cache
+
+# 按用户限制上传和批量删除的频率与并发数
+rate_limiter = UserLimiter(
+    file_service.configs.get('db', {}).get('redis', {}),
+    file_service.configs.get('config', {}).get('rate_limit', {})
+)
+
+# 分页配置
+api_settings = file_service.configs.get('config', {}).get('api', {})
+DEFAULT_PAGE_SIZE = int(api_settings.get('page_size', 20))
+MAX_PAGE_SIZE = int(api_settings.get('max_page_size', 100))
+
+# 每个工作进程同时保持的状态推送流上限：推送流在连接期间一直占用一个请求线程，超出时客户端改用轮询
+_status_stream_slots = threading.BoundedSemaphore(int(api_settings.get('status_stream_concurrency', 16)))
+
 # 日志配置
 logger = logging.getLogger(__name__)
 
+# 预先序列化的固定错误响应体，避免每次请求重复构造和编码
+_ERR_TOO_LARGE = precompile_json({'success': False, 'message': '上传文件过大', 'code': 413})
+_ERR_BAD_PARAMS = precompile_json({'success': False, 'message': '参数格式错误', 'code': 400})
+_ERR_NOT_FOUND_API = precompile_json({'success': False, 'message': '接口不存在', 'code': 404})
+_ERR_EMPTY_KEYWORD = precompile_json({'success': False, 'message': '搜索关键词不能为空', 'code': 400})
+_ERR_EMPTY_FILE_IDS = precompile_json({'success': False, 'message': '文件ID列表不能为空', 'code': 400})
+_ERR_FILE_NOT_FOUND = precompile_json({'success': False, 'message': '文件不存在', 'code': 404})
+_ERR_EMPTY_NAME = precompile_json({'success': False, 'message': '文件名不能为空', 'code': 400})
+_ERR_EMPTY_FILENAME = precompile_json({'success': False, 'message': '文件名为空', 'code': 400})
+_ERR_BAD_NAME = precompile_json({'success': False, 'message': '文件名包含非法字符', 'code': 400})
+_ERR_NOT_PDF = precompile_json({'success': False, 'message': '文件必须是PDF格式', 'code': 400})
+_ERR_EMPTY_NEW_NAME = precompile_json({'success': False, 'message': '新文件名不能为空', 'code': 400})
+_ERR_INTERNAL = precompile_json({'success': False, 'message': '服务器内部错误', 'code': 500})
+_ERR_NO_VALID_FILE_IDS = precompile_json({'success': False, 'message': '没有有效的文件ID', 'code': 400})
+_ERR_NO_FILE = precompile_json({'success': False, 'message': '没有选择文件', 'code': 400})
+_ERR_BAD_USER = precompile_json({'success': False, 'message': '用户ID无效', 'code': 400})
+_ERR_EMPTY_BODY = precompile_json({'success': False, 'message': '请求数据为空', 'code': 400})
+_ERR_METHOD_NOT_ALLOWED = precompile_json({'success': False, 'message': '请求方法不允许', 'code': 405})
+_ERR_BAD_TOTAL_SIZE = precompile_json({'success': False, 'message': '文件大小无效', 'code': 400})
+_ERR_BAD_OFFSET = precompile_json({'success': False, 'message': '缺少或无效的上传偏移量', 'code': 400})
+_ERR_LENGTH_REQUIRED = precompile_json({'success': False, 'message': '缺少Content-Length', 'code': 411})
+_ERR_RATE_LIMITED = precompile_json({'success': False, 'message': '请求过于频繁，请稍后再试', 'code': 429})
+_ERR_TOO_MANY_UPLOADS = precompile_json({'success': False, 'message': '同时进行的上传过多，请等待当前上传完成', 'code': 429})
+_ERR_STREAM_UNAVAILABLE = precompile_json({'success': False, 'message': '状态推送暂不可用，请使用状态查询接口', 'code': 503})
+
+# 文件名校验规则，模块加载时预编译
+_DANGEROUS_NAME_RE = re.compile(r'[/\\:*?"<>|]')
+MAX_FILENAME_LENGTH = 200
+
+# 状态推送流的保活间隔和单次连接的最长时间（秒），到期后由EventSource自动重连
+STATUS_STREAM_KEEPALIVE = 15
+STATUS_STREAM_MAX_DURATION = 300
+# 处理结束的状态，推送后关闭状态流
+_FINAL_PROCESS_STATUSES = ('completed', 'failed')
+
+# 分块上传的Content-Range格式: bytes 起始-结束/总大小
+_CONTENT_RANGE_RE = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+
+
+def _parse_int(raw: Any) -> Optional[int]:
+    """解析整数参数，无效时返回None"""
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def _paging_args() -> Optional[Tuple[int, int]]:
+    """
+    解析查询参数中的分页参数 page/page_size
+    页码小于1时按第一页处理，每页大小超出范围时使用默认值；格式错误返回None
+    """
+    page = _parse_int(request.args.get('page', 1))
+    page_size = _parse_int(request.args.get('page_size', DEFAULT_PAGE_SIZE))
+    if page is None or page_size is None:
+        return None
+    if page < 1:
+        page = 1
+    if page_size < 1 or page_size > MAX_PAGE_SIZE:
+        page_size = DEFAULT_PAGE_SIZE
+    return page, page_size
+
+
+def _positive_id(value: Any) -> Optional[int]:
+    """解析正整数ID（整数或纯数字字符串），无效时返回None，不经过异常处理"""
+    if type(value) is int:
+        return value if value > 0 else None
+    if isinstance(value, str):
+        value = value.strip()
+        if value.isascii() and value.isdigit():
+            return int(value) or None
+    return None
+
+
+def _clean_name(name: str) -> str:
+    """清理上传文件名 (secure_filename)，并限制长度"""
+    return secure_filename(name)[:MAX_FILENAME_LENGTH]
+
+
+def _safe_upload_name(original_filename: str) -> Optional[str]:
+    """生成保留扩展名的安全文件名，非PDF文件返回None"""
+    name, ext = os.path.splitext(original_filename)
+    if ext.lower() != '.pdf':
+        return None
+    # 名称被完全清理掉时使用时间戳
+    safe_name = (_clean_name(name) if name else '') or f"file_{int(time.time())}"
+    return safe_name + ext
+
+
+def _rate_limited_response():
+    """请求频率超限响应，Retry-After为当前限流窗口的剩余秒数"""
+    response = error_response(_ERR_RATE_LIMITED, 429)
+    response.headers['Retry-After'] = str(rate_limiter.retry_after())
+    return response
+
+
+def _cache_scope(user_id: int) -> str:
+    """用户文件数据的缓存作用域"""
+    return file_cache_scope(user_id)
+
+
+def _cached_response(user_id: int, field: str, ttl: float):
+    """读取缓存的JSON响应，未命中时返回None"""
+    body = response_cache.get(_cache_scope(user_id), field, ttl)
+    if body is None:
+        return None
+    return current_app.response_class(body, mimetype='application/json')
+
+
+def _cache_response(response, user_id: int, field: str):
+    """缓存成功的JSON响应并原样返回"""
+    response_cache.set(_cache_scope(user_id), field, response.get_data())
+    return response
+
+
+def _upload_result_response(result: Dict[str, Any], user_id: int):
+    """构造上传结果响应，上传成功时使该用户的文件缓存失效"""
+    if result['success']:
+        response_cache.invalidate(_cache_scope(user_id))
+        return json_response({
+            'success': True,
+            'message': result['message'],
+            'data': {
+                'file_id': result['file_id'],
+                'filename': result['filename'],
+                'size': result['size']
+            },
+            'code': 200
+        }, 200)
+    else:
+        return json_response({
+            'success': False,
+            'message': result['message'],
+            'code': 400
+        }, 400)
+
 
 @file_bp.route('/upload', methods=['POST'])
 def upload_file():
     """
     文件上传接口
     
+    Query Parameters:
+        user_id: 用户ID
+        
     Returns:
         JSON响应包含上传结果
     """
     try:
-        # 检查文件是否存在
-        if 'file' not in request.files:
-            return jsonify({
-                'success': False,
-                'message': '没有选择文件',
-                'code': 400
-            }), 400
+        # 用户ID从查询参数获取，在解析multipart请求体之前完成限流检查，
+        # 被拒绝的请求不会把整个请求体读入内存或临时文件
+        user_id = _parse_int(request.args.get('user_id', 1))
+        if user_id is None:
+            return error_response(_ERR_BAD_USER, 400)
+        if not rate_limiter.allow('upload', user_id):
+            return _rate_limited_response()
             
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({
-                'success': False,
-                'message': '文件名为空',
-                'code': 400
-            }), 400
+        with rate_limiter.slot('upload', user_id) as acquired:
+            if not acquired:
+                return error_response(_ERR_TOO_MANY_UPLOADS, 429)
+                
+            # 检查文件是否存在
+            if 'file' not in request.files:
+                return error_response(_ERR_NO_FILE, 400)
+                
+            file = request.files['file']
+            if file.filename == '':
+                return error_response(_ERR_EMPTY_FILENAME, 400)
+                
+            # 安全文件名处理，确保保留扩展名（同时检查是否是PDF文件）
+            original_filename = file.filename
+            filename = _safe_upload_name(original_filename)
+            if filename is None:
+                return error_response(_ERR_NOT_PDF, 400)
+                
+            # 调用服务层流式写入文件 - 传递原始文件名和安全文件名，不将整个文件读入内存
+            result = run_async(file_service.upload_stream(file.stream, filename, user_id, original_filename))
             
-        # 获取用户ID（从session或token中获取，这里简化处理）
-        user_id = request.form.get('user_id', 1)  # 默认用户ID为1
-        try:
-            user_id = int(user_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '用户ID无效',
-                'code': 400
-            }), 400
+        return _upload_result_response(result, user_id)
             
-        # 安全文件名处理 - 改进版本，确保保留扩展名
-        original_filename = file.filename
-        import os
-        name, ext = os.path.splitext(original_filename)
+    except Exception:
+        logger.exception("文件上传接口错误")
+        return error_response(_ERR_INTERNAL, 500)
+
+
+@file_bp.route('/upload/raw', methods=['POST'])
+def upload_raw_file():
+    """
+    原始请求体上传接口
+    
+    请求体直接为PDF文件内容，不使用multipart编码，服务端不需要解析multipart边界，直接将请求体写入存储
+    
+    Headers:
+        X-Filename: 原始文件名（非ASCII字符需URL编码）
+        Content-Length: 文件大小
         
-        # 检查是否是PDF文件
-        if ext.lower() != '.pdf':
-            return jsonify({
-                'success': False,
-                'message': '文件必须是PDF格式',
-                'code': 400
-            }), 400
+    Query Parameters:
+        user_id: 用户ID
         
-        # 使用secure_filename处理文件名，但确保保留扩展名
-        safe_name = secure_filename(name) if name else f"file_{int(time.time())}"
-        if not safe_name:  # 如果名称被完全清理掉，使用时间戳
-            safe_name = f"file_{int(time.time())}"
+    Returns:
+        JSON响应包含上传结果
+    """
+    try:
+        user_id = _parse_int(request.args.get('user_id', 1))
+        if user_id is None:
+            return error_response(_ERR_BAD_USER, 400)
+        if not rate_limiter.allow('upload', user_id):
+            return _rate_limited_response()
+            
+        original_filename = unquote(request.headers.get('X-Filename', '')).strip()
+        if not original_filename:
+            return error_response(_ERR_EMPTY_FILENAME, 400)
+        filename = _safe_upload_name(original_filename)
+        if filename is None:
+            return error_response(_ERR_NOT_PDF, 400)
+            
+        if request.content_length is None:
+            return error_response(_ERR_LENGTH_REQUIRED, 411)
+            
+        with rate_limiter.slot('upload', user_id) as acquired:
+            if not acquired:
+                return error_response(_ERR_TOO_MANY_UPLOADS, 429)
+            result = run_async(file_service.upload_stream(request.stream, filename, user_id, original_filename))
+            
+        return _upload_result_response(result, user_id)
         
-        filename = safe_name + ext
+    except Exception:
+        logger.exception("原始请求体上传接口错误")
+        return error_response(_ERR_INTERNAL, 500)
+
+
+@file_bp.route('/upload/init', methods=['POST'])
+def init_chunk_upload():
+    """
+    创建分块上传会话接口
+    
+    大文件可通过分块上传接口直接发送原始文件内容，不经过multipart解析，网络中断后可从已上传的偏移量继续
+    
+    JSON Body:
+        filename: 原始文件名
+        total_size: 文件总大小（字节）
+        user_id: 用户ID
+        
+    Returns:
+        JSON响应包含上传令牌和分块上传地址
+    """
+    try:
+        data = json_body()
+        if not data or not isinstance(data, dict):
+            return error_response(_ERR_EMPTY_BODY, 400)
+            
+        original_filename = data.get('filename') or ''
+        if not original_filename:
+            return error_response(_ERR_EMPTY_FILENAME, 400)
+        filename = _safe_upload_name(original_filename)
+        if filename is None:
+            return error_response(_ERR_NOT_PDF, 400)
+            
+        user_id = _parse_int(data.get('user_id', 1))
+        if user_id is None:
+            return error_response(_ERR_BAD_USER, 400)
+        if not rate_limiter.allow('upload', user_id):
+            return _rate_limited_response()
+        total_size = _parse_int(data.get('total_size'))
+        if total_size is None:
+            return error_response(_ERR_BAD_TOTAL_SIZE, 400)
             
-        # 读取文件数据
-        file_data = file.read()
-        if not file_data:
-            return jsonify({
+        result = run_async(file_service.init_upload(filename, user_id, total_size, original_filename))
+        
+        if result['success']:
+            upload_url = url_for('file.upload_chunk', token=result['token'], user_id=user_id)
+            response = json_response({
+                'success': True,
+                'message': result['message'],
+                'data': {
+                    'token': result['token'],
+                    'upload_url': upload_url,
+                    'offset': result['offset'],
+                    'total_size': result['total_size']
+                },
+                'code': 201
+            }, 201)
+            response.headers['Location'] = upload_url
+            response.headers['Upload-Offset'] = str(result['offset'])
+            return response
+        else:
+            code = result.get('code', 400)
+            return json_response({
                 'success': False,
-                'message': '文件内容为空',
-                'code': 400
-            }), 400
+                'message': result['message'],
+                'code': code
+            }, code)
+            
+    except Exception:
+        logger.exception("创建上传会话接口错误")
+        return error_response(_ERR_INTERNAL, 500)
+
+
+@file_bp.route('/upload/chunk/<token>', methods=['GET'])
+def get_chunk_upload_offset(token: str):
+    """
+    查询分块上传进度接口（断点续传前调用，也支持HEAD请求）
+    
+    Args:
+        token: 上传令牌
+        
+    Query Parameters:
+        user_id: 用户ID
+        
+    Returns:
+        JSON响应包含已上传的偏移量，同时通过Upload-Offset响应头返回
+    """
+    try:
+        user_id = _parse_int(request.args.get('user_id', 1))
+        if user_id is None:
+            return error_response(_ERR_BAD_USER, 400)
             
-        # 调用服务层处理文件上传 - 传递原始文件名和安全文件名
-        result = asyncio.run(file_service.upload_file(file_data, filename, user_id, original_filename))
+        result = run_async(file_service.get_upload_offset(token, user_id))
         
         if result['success']:
-            return jsonify({
+            response = json_response({
                 'success': True,
                 'message': result['message'],
                 'data': {
+                    'offset': result['offset'],
+                    'total_size': result['total_size']
+                },
+                'code': 200
+            })
+            response.headers['Upload-Offset'] = str(result['offset'])
+            response.headers['Upload-Length'] = str(result['total_size'])
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+        else:
+            code = result.get('code', 400)
+            return json_response({
+                'success': False,
+                'message': result['message'],
+                'code': code
+            }, code)
+            
+    except Exception:
+        logger.exception("查询上传进度接口错误")
+        return error_response(_ERR_INTERNAL, 500)
+
+
+@file_bp.route('/upload/chunk/<token>', methods=['PATCH'])
+def upload_chunk(token: str):
+    """
+    分块上传接口
+    
+    请求体为文件的原始字节，偏移量通过 Upload-Offset 或 Content-Range 请求头指定，且必须等于已上传的大小；
+    最后一个分块写入后自动完成上传
+    
+    Args:
+        token: 上传令牌
+        
+    Query Parameters:
+        user_id: 用户ID
+        
+    Returns:
+        JSON响应包含新的偏移量，上传完成时包含文件信息
+    """
+    try:
+        user_id = _parse_int(request.args.get('user_id', 1))
+        if user_id is None:
+            return error_response(_ERR_BAD_USER, 400)
+            
+        length = request.content_length
+        if length is None:
+            return error_response(_ERR_LENGTH_REQUIRED, 411)
+            
+        # 解析分块偏移量
+        content_range = request.headers.get('Content-Range')
+        if content_range is not None:
+            match = _CONTENT_RANGE_RE.fullmatch(content_range.strip())
+            if match is None or int(match.group(2)) - int(match.group(1)) + 1 != length:
+                return error_response(_ERR_BAD_OFFSET, 400)
+            offset = int(match.group(1))
+        else:
+            offset = _parse_int(request.headers.get('Upload-Offset'))
+            if offset is None or offset < 0:
+                return error_response(_ERR_BAD_OFFSET, 400)
+                
+        with rate_limiter.slot('upload', user_id) as acquired:
+            if not acquired:
+                return error_response(_ERR_TOO_MANY_UPLOADS, 429)
+            result = run_async(file_service.upload_chunk(token, user_id, offset, request.stream, length))
+        
+        if result['success']:
+            if result['completed']:
+                response_cache.invalidate(_cache_scope(user_id))
+                data = {
+                    'completed': True,
+                    'offset': result['offset'],
                     'file_id': result['file_id'],
                     'filename': result['filename'],
                     'size': result['size']
-                },
+                }
+            else:
+                data = {
+                    'completed': False,
+                    'offset': result['offset']
+                }
+            response = json_response({
+                'success': True,
+                'message': result['message'],
+                'data': data,
                 'code': 200
-            }), 200
+            })
         else:
-            return jsonify({
+            code = result.get('code', 400)
+            response = json_response({
                 'success': False,
                 'message': result['message'],
-                'code': 400
-            }), 400
+                'data': {'offset': result['offset']} if 'offset' in result else None,
+                'code': code
+            }, code)
             
-    except Exception as e:
-        logger.error(f"文件上传接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+        if 'offset' in result:
+            response.headers['Upload-Offset'] = str(result['offset'])
+        return response
+            
+    except Exception:
+        logger.exception("分块上传接口错误")
+        return error_response(_ERR_INTERNAL, 500)
 
 
 @file_bp.route('/list', methods=['GET'])
@@ -128,60 +484,53 @@ def get_file_list():
     
     Query Parameters:
         user_id: 用户ID
-        page: 页码，默认1
+        cursor: 游标分页位置，取上一页返回的next_cursor，首页传空或0
+        page: 页码，默认1（传入cursor时忽略）
         page_size: 每页大小，默认20
         
     Returns:
         JSON响应包含文件列表
     """
     try:
-        # 获取查询参数
-        user_id = request.args.get('user_id', 1)
-        page = request.args.get('page', 1)
-        page_size = request.args.get('page_size', 20)
+        # 获取并验证查询参数
+        user_id = _parse_int(request.args.get('user_id', 1))
+        paging = _paging_args()
+        if user_id is None or paging is None:
+            return error_response(_ERR_BAD_PARAMS, 400)
+        page, page_size = paging
         
-        # 参数验证
-        try:
-            user_id = int(user_id)
-            page = int(page)
-            page_size = int(page_size)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '参数格式错误',
-                'code': 400
-            }), 400
-            
-        # 参数范围检查
-        if page < 1:
-            page = 1
-        if page_size < 1 or page_size > 100:
-            page_size = 20
+        cursor = None
+        raw_cursor = request.args.get('cursor')
+        if raw_cursor is not None:
+            cursor = _parse_int(raw_cursor) if raw_cursor else 0
+            if cursor is None:
+                return error_response(_ERR_BAD_PARAMS, 400)
             
-        # 调用服务层获取文件列表
-        result = asyncio.run(file_service.get_file_list(user_id, page, page_size))
-        
-        if result['success']:
-            return jsonify({
+        # 优先返回缓存的响应
+        cache_field = f"list:c{cursor}:{page_size}" if cursor is not None else f"list:{page}:{page_size}"
+        response = _cached_response(user_id, cache_field, cache_settings.get('list_ttl', 10))
+        if response is None:
+            # 调用服务层获取文件列表
+            result = run_async(file_service.get_file_list(user_id, page, page_size, cursor=cursor))
+            if not result['success']:
+                return json_response({
+                    'success': False,
+                    'message': result['message'],
+                    'code': 400
+                }, 400)
+                
+            response = _cache_response(json_response({
                 'success': True,
                 'message': '获取文件列表成功',
                 'data': result['data'],
                 'code': 200
-            }), 200
-        else:
-            return jsonify({
-                'success': False,
-                'message': result['message'],
-                'code': 400
-            }), 400
+            }, iso_datetime=True), user_id, cache_field)
             
-    except Exception as e:
-        logger.error(f"获取文件列表接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+        return response
+            
+    except Exception:
+        logger.exception("获取文件列表接口错误")
+        return error_response(_ERR_INTERNAL, 500)
 
 
 @file_bp.route('/delete/<int:file_id>', methods=['DELETE'])
@@ -198,38 +547,30 @@ def delete_file(file_id: int):
     try:
         # 获取用户ID
         user_id = request.args.get('user_id', 1)
-        try:
-            user_id = int(user_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '用户ID无效',
-                'code': 400
-            }), 400
+        user_id = _parse_int(user_id)
+        if user_id is None:
+            return error_response(_ERR_BAD_USER, 400)
             
         # 调用服务层删除文件
-        result = asyncio.run(file_service.delete_file(file_id, user_id))
+        result = run_async(file_service.delete_file(file_id, user_id))
         
         if result['success']:
-            return jsonify({
+            response_cache.invalidate(_cache_scope(user_id))
+            return json_response({
                 'success': True,
                 'message': result['message'],
                 'code': 200
-            }), 200
+            }, 200)
         else:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'message': result['message'],
                 'code': 400
-            }), 400
+            }, 400)
             
-    except Exception as e:
-        logger.error(f"删除文件接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+    except Exception:
+        logger.exception("删除文件接口错误")
+        return error_response(_ERR_INTERNAL, 500)
 
 
 @file_bp.route('/rename/<int:file_id>', methods=['PUT'])
@@ -249,13 +590,9 @@ def rename_file(file_id: int):
     """
     try:
         # 获取请求数据
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                'success': False,
-                'message': '请求数据为空',
-                'code': 400
-            }), 400
+        data = json_body()
+        if not data or not isinstance(data, dict):
+            return error_response(_ERR_EMPTY_BODY, 400)
             
         new_name = data.get('new_name', '').strip()
         user_id = data.get('user_id', 1)
@@ -265,61 +602,40 @@ def rename_file(file_id: int):
         
         # 参数验证
         if not new_name:
-            return jsonify({
-                'success': False,
-                'message': '新文件名不能为空',
-                'code': 400
-            }), 400
+            return error_response(_ERR_EMPTY_NEW_NAME, 400)
             
-        try:
-            user_id = int(user_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '用户ID无效',
-                'code': 400
-            }), 400
+        user_id = _parse_int(user_id)
+        if user_id is None:
+            return error_response(_ERR_BAD_USER, 400)
             
         # 基本文件名验证（保留中文字符）
         if not new_name.strip():
-            return jsonify({
-                'success': False,
-                'message': '文件名不能为空',
-                'code': 400
-            }), 400
+            return error_response(_ERR_EMPTY_NAME, 400)
             
         # 检查文件名是否包含危险字符
-        dangerous_chars = ['/', '\\', ':', '*', '?', '"', '<', '>', '|']
-        if any(char in new_name for char in dangerous_chars):
-            return jsonify({
-                'success': False,
-                'message': '文件名包含非法字符',
-                'code': 400
-            }), 400
+        if _DANGEROUS_NAME_RE.search(new_name):
+            return error_response(_ERR_BAD_NAME, 400)
             
         # 调用服务层重命名文件
-        result = asyncio.run(file_service.rename_file(file_id, new_name, user_id))
+        result = run_async(file_service.rename_file(file_id, new_name, user_id))
         
         if result['success']:
-            return jsonify({
+            response_cache.invalidate(_cache_scope(user_id))
+            return json_response({
                 'success': True,
                 'message': result['message'],
                 'code': 200
-            }), 200
+            }, 200)
         else:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'message': result['message'],
                 'code': 400
-            }), 400
+            }, 400)
             
-    except Exception as e:
-        logger.error(f"重命名文件接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+    except Exception:
+        logger.exception("重命名文件接口错误")
+        return error_response(_ERR_INTERNAL, 500)
 
 
 @file_bp.route('/status/<int:file_id>', methods=['GET'])
@@ -339,39 +655,121 @@ def get_file_status(file_id: int):
     try:
         # 获取用户ID
         user_id = request.args.get('user_id', 1)
-        try:
-            user_id = int(user_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '用户ID无效',
-                'code': 400
-            }), 400
+        user_id = _parse_int(user_id)
+        if user_id is None:
+            return error_response(_ERR_BAD_USER, 400)
+            
+        # 优先返回缓存的响应
+        cache_field = f"status:{file_id}"
+        cached = _cached_response(user_id, cache_field, cache_settings.get('status_ttl', 1))
+        if cached is not None:
+            return cached
             
         # 调用服务层获取文件处理状态
-        result = asyncio.run(file_service.get_file_processing_status(file_id, user_id))
+        result = run_async(file_service.get_file_processing_status(file_id, user_id))
         
         if result['success']:
-            return jsonify({
+            return _cache_response(json_response({
                 'success': True,
                 'message': '获取文件状态成功',
                 'data': result['data'],
                 'code': 200
-            }), 200
+            }), user_id, cache_field)
         else:
-            return jsonify({
+            return json_response({
                 'success': False,
                 'message': result['message'],
                 'code': 400
-            }), 400
+            }, 400)
             
-    except Exception as e:
-        logger.error(f"获取文件状态接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+    except Exception:
+        logger.exception("获取文件状态接口错误")
+        return error_response(_ERR_INTERNAL, 500)
+
+
+@file_bp.route('/status/<int:file_id>/stream', methods=['GET'])
+def stream_file_status(file_id: int):
+    """
+    文件处理状态推送接口 (Server-Sent Events)
+    
+    连接建立时先推送当前状态，之后在处理任务更新进度时推送变化，处理完成或失败后关闭；
+    推送不可用时返回503，客户端改用 /status/<file_id> 轮询
+    
+    Args:
+        file_id: 文件ID
+        
+    Query Parameters:
+        user_id: 用户ID
+        
+    Returns:
+        text/event-stream 响应，每个事件的data为状态JSON
+    """
+    try:
+        user_id = _parse_int(request.args.get('user_id', 1))
+        if user_id is None:
+            return error_response(_ERR_BAD_USER, 400)
+            
+        # 推送流在连接期间一直占用一个请求线程，名额已满时客户端改用轮询
+        if not _status_stream_slots.acquire(blocking=False):
+            return error_response(_ERR_STREAM_UNAVAILABLE, 503)
+            
+        pubsub = None
+        streaming = False
+        try:
+            # 先订阅再读取当前状态，避免遗漏两者之间发生的状态变化
+            pubsub = file_service.progress.subscribe(file_id)
+            file_info = run_async(file_service.get_owned_file_info(file_id, user_id))
+            if not file_info:
+                return error_response(_ERR_FILE_NOT_FOUND, 404)
+            if pubsub is None:
+                return error_response(_ERR_STREAM_UNAVAILABLE, 503)
+                
+            snapshot = {
+                'file_id': file_id,
+                'process_status': file_info['process_status'],
+                'process_progress': file_info['process_progress'],
+                'content_extracted': bool(file_info['content_extracted']),
+                'indexed': bool(file_info['indexed'])
+            }
+            
+            def event_stream():
+                try:
+                    yield b'retry: 3000\ndata: ' + dumps_state(snapshot) + b'\n\n'
+                    if snapshot['process_status'] in _FINAL_PROCESS_STATUSES:
+                        return
+                        
+                    deadline = time.monotonic() + STATUS_STREAM_MAX_DURATION
+                    while time.monotonic() < deadline:
+                        message = pubsub.get_message(timeout=STATUS_STREAM_KEEPALIVE)
+                        if message is None:
+                            # 注释行保活，防止代理因空闲断开连接
+                            yield b': keepalive\n\n'
+                            continue
+                        yield b'data: ' + message['data'] + b'\n\n'
+                        if loads_state(message['data']).get('process_status') in _FINAL_PROCESS_STATUSES:
+                            return
+                except Exception as e:
+                    logger.warning(f"文件状态推送中断: file_id={file_id}, {e}")
+                    
+            response = current_app.response_class(
+                event_stream(),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+            # 响应结束（包括客户端断开）时服务器关闭响应，释放订阅连接和推送名额
+            response.call_on_close(pubsub.close)
+            response.call_on_close(_status_stream_slots.release)
+            streaming = True
+            return response
+        finally:
+            if not streaming:
+                if pubsub is not None:
+                    pubsub.close()
+                _status_stream_slots.release()
+        
+    except Exception:
+        logger.exception("文件状态推送接口错误")
+        return error_response(_ERR_INTERNAL, 500)
 
 
 @file_bp.route('/batch/delete', methods=['POST'])
@@ -388,13 +786,9 @@ def batch_delete_files():
     """
     try:
         # 获取请求数据
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                'success': False,
-                'message': '请求数据为空',
-                'code': 400
-            }), 400
+        data = json_body()
+        if not data or not isinstance(data, dict):
+            return error_response(_ERR_EMPTY_BODY, 400)
             
         file_ids = data.get('file_ids', [])
         user_id = data.get('user_id', 1)
@@ -404,68 +798,38 @@ def batch_delete_files():
         
         # 参数验证
         if not file_ids or not isinstance(file_ids, list):
-            return jsonify({
-                'success': False,
-                'message': '文件ID列表不能为空',
-                'code': 400
-            }), 400
+            return error_response(_ERR_EMPTY_FILE_IDS, 400)
             
-        try:
-            # 验证user_id
-            if user_id is None:
-                user_id = 1  # 默认用户ID
-            user_id = int(user_id)
-            
-            # 验证并转换文件ID，过滤掉无效值
-            validated_file_ids = []
-            for i, fid in enumerate(file_ids):
-                try:
-                    if fid is not None and str(fid).strip():
-                        file_id = int(fid)
-                        if file_id > 0:  # 确保是正数
-                            validated_file_ids.append(file_id)
-                        else:
-                            logger.warning(f"跳过无效文件ID (非正数): {fid}")
-                    else:
-                        logger.warning(f"跳过空文件ID at index {i}: {fid}")
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"跳过无效文件ID at index {i}: {fid}, 错误: {e}")
-                    continue
-                    
-            file_ids = validated_file_ids
+        # 验证user_id
+        if user_id is None:
+            user_id = 1  # 默认用户ID
+        user_id = _parse_int(user_id)
+        if user_id is None:
+            return error_response(_ERR_BAD_USER, 400)
+        if not rate_limiter.allow('batch_delete', user_id):
+            return _rate_limited_response()
             
-            if not file_ids:
-                return jsonify({
-                    'success': False,
-                    'message': '没有有效的文件ID',
-                    'code': 400
-                }), 400
-                
-            logger.info(f"验证后的参数: user_id={user_id}, file_ids={file_ids}")
-                
-        except (ValueError, TypeError) as e:
-            logger.error(f"参数转换错误: {e}")
-            return jsonify({
-                'success': False,
-                'message': f'参数格式错误: {str(e)}',
-                'code': 400
-            }), 400
+        # 验证并转换文件ID，过滤掉无效值（汇总记录一次日志）
+        validated_file_ids = [file_id for file_id in map(_positive_id, file_ids) if file_id]
+        skipped_count = len(file_ids) - len(validated_file_ids)
+        if skipped_count:
+            logger.warning(f"跳过 {skipped_count} 个无效文件ID")
+        file_ids = validated_file_ids
+        
+        if not file_ids:
+            return error_response(_ERR_NO_VALID_FILE_IDS, 400)
             
-        # 批量删除文件
-        results = []
-        for file_id in file_ids:
-            result = asyncio.run(file_service.delete_file(file_id, user_id))
-            results.append({
-                'file_id': file_id,
-                'success': result['success'],
-                'message': result['message']
-            })
+        logger.info(f"验证后的参数: user_id={user_id}, file_ids={file_ids}")
+            
+        # 批量删除文件 (整批只执行一次归属查询和一次DELETE)
+        results = run_async(file_service.delete_files_bulk(file_ids, user_id))
+        response_cache.invalidate(_cache_scope(user_id))
             
         # 统计结果
         success_count = sum(1 for r in results if r['success'])
         total_count = len(results)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'message': f'批量删除完成，成功删除 {success_count}/{total_count} 个文件',
             'data': {
@@ -474,15 +838,11 @@ def batch_delete_files():
                 'total_count': total_count
             },
             'code': 200
-        }), 200
+        }, 200)
         
-    except Exception as e:
-        logger.error(f"批量删除文件接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+    except Exception:
+        logger.exception("批量删除文件接口错误")
+        return error_response(_ERR_INTERNAL, 500)
 
 
 @file_bp.route('/search', methods=['GET'])
@@ -500,54 +860,39 @@ def search_files():
         JSON响应包含搜索结果
     """
     try:
-        # 获取查询参数
-        user_id = request.args.get('user_id', 1)
+        # 获取并验证查询参数
+        user_id = _parse_int(request.args.get('user_id', 1))
         keyword = request.args.get('keyword', '').strip()
-        page = request.args.get('page', 1)
-        page_size = request.args.get('page_size', 20)
+        paging = _paging_args()
+        if user_id is None or paging is None:
+            return error_response(_ERR_BAD_PARAMS, 400)
+        page, page_size = paging
         
-        # 参数验证
-        try:
-            user_id = int(user_id)
-            page = int(page)
-            page_size = int(page_size)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '参数格式错误',
-                'code': 400
-            }), 400
-            
         if not keyword:
-            return jsonify({
-                'success': False,
-                'message': '搜索关键词不能为空',
-                'code': 400
-            }), 400
+            return error_response(_ERR_EMPTY_KEYWORD, 400)
             
-        # 参数范围检查
-        if page < 1:
-            page = 1
-        if page_size < 1 or page_size > 100:
-            page_size = 20
+        # 优先返回缓存的响应（文件变更时与列表缓存一同失效）
+        cache_field = f"search:{page}:{page_size}:{keyword}"
+        cached = _cached_response(user_id, cache_field, cache_settings.get('search_ttl', 10))
+        if cached is not None:
+            return cached
             
         # 实现文件搜索逻辑：按文件名搜索
-        result = asyncio.run(file_service.search_files(user_id, keyword, page, page_size))
+        result = run_async(file_service.search_files(user_id, keyword, page, page_size))
         
-        return jsonify({
+        response = json_response({
             'success': True,
             'message': '搜索完成',
             'data': result['data'],
             'code': 200
-        }), 200
+        }, 200, iso_datetime=True)
+        if result['success']:
+            _cache_response(response, user_id, cache_field)
+        return response
         
-    except Exception as e:
-        logger.error(f"搜索文件接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+    except Exception:
+        logger.exception("搜索文件接口错误")
+        return error_response(_ERR_INTERNAL, 500)
 
 
 @file_bp.route('/info/<int:file_id>', methods=['GET'])
@@ -567,99 +912,55 @@ def get_file_info(file_id: int):
     try:
         # 获取用户ID
         user_id = request.args.get('user_id', 1)
-        try:
-            user_id = int(user_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '用户ID无效',
-                'code': 400
-            }), 400
+        user_id = _parse_int(user_id)
+        if user_id is None:
+            return error_response(_ERR_BAD_USER, 400)
+            
+        # 优先返回缓存的响应
+        cache_field = f"info:{file_id}"
+        cached = _cached_response(user_id, cache_field, cache_settings.get('info_ttl', 30))
+        if cached is not None:
+            return cached
             
-        # 获取文件信息
-        file_info = asyncio.run(file_service._get_file_info(file_id))
+        # 获取文件信息（查询只返回可对外展示的字段，并同时校验文件归属）
+        safe_info = run_async(file_service.get_owned_file_info(file_id, user_id))
         
-        if not file_info:
-            return jsonify({
-                'success': False,
-                'message': '文件不存在',
-                'code': 404
-            }), 404
+        if not safe_info:
+            return error_response(_ERR_FILE_NOT_FOUND, 404)
             
-        if file_info['user_id'] != user_id:
-            return jsonify({
-                'success': False,
-                'message': '无权限访问此文件',
-                'code': 403
-            }), 403
-            
-        # 移除敏感信息
-        safe_info = {
-            'id': file_info['id'],
-            'original_name': file_info['original_name'],
-            'file_size': file_info['file_size'],
-            'upload_status': file_info['upload_status'],
-            'process_status': file_info['process_status'],
-            'process_progress': file_info['process_progress'],
-            'content_extracted': file_info['content_extracted'],
-            'indexed': file_info['indexed'],
-            'created_at': file_info['created_at'].isoformat() if file_info['created_at'] else None,
-            'updated_at': file_info['updated_at'].isoformat() if file_info['updated_at'] else None
-        }
-        
-        return jsonify({
+        return _cache_response(json_response({
             'success': True,
             'message': '获取文件信息成功',
             'data': safe_info,
             'code': 200
-        }), 200
+        }, iso_datetime=True), user_id, cache_field)
         
-    except Exception as e:
-        logger.error(f"获取文件信息接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+    except Exception:
+        logger.exception("获取文件信息接口错误")
+        return error_response(_ERR_INTERNAL, 500)
 
 
 # 错误处理
 @file_bp.errorhandler(404)
 def not_found(error):
     """404错误处理"""
-    return jsonify({
-        'success': False,
-        'message': '接口不存在',
-        'code': 404
-    }), 404
+    return error_response(_ERR_NOT_FOUND_API, 404)
 
 
 @file_bp.errorhandler(405)
 def method_not_allowed(error):
     """405错误处理"""
-    return jsonify({
-        'success': False,
-        'message': '请求方法不允许',
-        'code': 405
-    }), 405
+    return error_response(_ERR_METHOD_NOT_ALLOWED, 405)
 
 
 @file_bp.errorhandler(413)
 def request_entity_too_large(error):
     """413错误处理 - 文件过大"""
-    return jsonify({
-        'success': False,
-        'message': '上传文件过大',
-        'code': 413
-    }), 413
+    return error_response(_ERR_TOO_LARGE, 413)
 
 
 @file_bp.errorhandler(500)
 def internal_server_error(error):
     """500错误处理"""
-    logger.error(f"内部服务器错误: {error}")
-    return jsonify({
-        'success': False,
-        'message': '服务器内部错误',
-        'code': 500
-    }), 500 
\ No newline at end of file
+    logger.error("内部服务器错误: %s", error)
+    return error_response(_ERR_INTERNAL, 500) 
\ No newline at end of file
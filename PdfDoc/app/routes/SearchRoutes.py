@@ -5,14 +5,17 @@
 处理智能检索相关的HTTP请求
 """
 
-import asyncio
 import logging
-from flask import Blueprint, request, jsonify, Response
-from typing import Dict, Any
-import json
+import threading
+import functools
+from flask import Blueprint, request, Response, current_app
+from typing import Dict, Any, List, Optional
 
 # 导入服务层
 from ..service.SearchService import SearchService
+from ..utils.async_runner import run_async, iterate_async
+from ..utils.cache import ResponseCache
+from ..utils.responses import json_response, error_response, precompiled_response, precompile_json, json_body, dumps_plain
 
 # 创建蓝图
 search_bp = Blueprint('search', __name__, url_prefix='/api/search')
@@ -20,12 +23,158 @@ search_bp = Blueprint('search', __name__, url_prefix='/api/search')
 # 初始化服务
 search_service = SearchService()
 
+# 接口响应缓存（会话列表和搜索建议按用户、聊天历史按会话划分作用域，数据变更时整体失效）
+cache_settings = search_service.configs.get('config', {}).get('api_cache', {})
+response_cache = ResponseCache(search_service.configs.get('db', {}).get('redis', {}), cache_settings)
+
 # 日志配置
 logger = logging.getLogger(__name__)
 
+# 搜索建议配置：同时进行的建议查询数量上限（每个工作进程）
+api_settings = search_service.configs.get('config', {}).get('api', {})
+_suggestion_slots = threading.BoundedSemaphore(int(api_settings.get('suggestion_concurrency', 8)))
+
+# LIKE模式中的通配符转义表
+_LIKE_ESCAPE = str.maketrans({'%': r'\%', '_': r'\_', '\\': r'\\'})
+
+# 预先序列化的固定错误响应体，避免每次请求重复构造和编码
+_ERR_BAD_PARAMS = precompile_json({'success': False, 'message': '参数格式错误', 'code': 400})
+_ERR_BAD_USER = precompile_json({'success': False, 'message': '用户ID格式错误', 'code': 400})
+_ERR_EMPTY_BODY = precompile_json({'success': False, 'message': '请求数据为空', 'code': 400})
+_ERR_EMPTY_KEYWORD = precompile_json({'success': False, 'message': '关键词不能为空', 'code': 400})
+_ERR_EMPTY_NEW_NAME = precompile_json({'success': False, 'message': '新会话名称不能为空', 'code': 400})
+_ERR_EMPTY_QUERY = precompile_json({'success': False, 'message': '查询问题不能为空', 'code': 400})
+_ERR_EMPTY_SESSION_ID = precompile_json({'success': False, 'message': '会话ID不能为空', 'code': 400})
+_ERR_EMPTY_USER = precompile_json({'success': False, 'message': '用户ID不能为空', 'code': 400})
+_ERR_MISSING_PARAMS = precompile_json({'success': False, 'message': '必要参数不能为空', 'code': 400})
+_ERR_SESSION_FORBIDDEN = precompile_json({'success': False, 'message': '会话不存在或无权限访问', 'code': 403})
+_ERR_NOT_FOUND_API = precompile_json({'success': False, 'message': '接口不存在', 'code': 404})
+_ERR_METHOD_NOT_ALLOWED = precompile_json({'success': False, 'message': '请求方法不允许', 'code': 405})
+_ERR_ANALYTICS_FAILED = precompile_json({'success': False, 'message': '获取搜索分析失败', 'code': 500})
+_ERR_DELETE_SESSION_FAILED = precompile_json({'success': False, 'message': '删除会话失败', 'code': 500})
+_ERR_INTERNAL = precompile_json({'success': False, 'message': '服务器内部错误', 'code': 500})
+_ERR_RENAME_SESSION_FAILED = precompile_json({'success': False, 'message': '重命名会话失败', 'code': 500})
+_ERR_SUGGESTIONS_FAILED = precompile_json({'success': False, 'message': '获取搜索建议失败', 'code': 500})
+
+# 会话删除、重命名成功时的固定响应体
+_OK_SESSION_DELETED = precompile_json({'success': True, 'message': '会话删除成功', 'code': 200})
+_OK_SESSION_RENAMED = precompile_json({'success': True, 'message': '会话重命名成功', 'code': 200})
+
+# 建议查询繁忙时返回的空建议
+_EMPTY_SUGGESTIONS = precompile_json({
+    'success': True,
+    'message': '获取搜索建议成功',
+    'data': {'suggestions': [], 'count': 0},
+    'code': 200
+})
+
+
+def _handle_errors(error_label: str):
+    """接口异常处理装饰器：未处理的异常记录堆栈后返回固定的500响应体"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                return view(*args, **kwargs)
+            except Exception:
+                logger.exception(error_label)
+                return error_response(_ERR_INTERNAL, 500)
+        return wrapper
+    return decorator
+
+
+def _json_request(view):
+    """
+    JSON请求体解析装饰器：请求体作为第一个参数传入接口
+    
+    请求体为空或不是合法JSON时返回400（不抛出BadRequest），不是JSON对象时返回参数格式错误
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        data = json_body()
+        if not data:
+            return error_response(_ERR_EMPTY_BODY, 400)
+        if not isinstance(data, dict):
+            return error_response(_ERR_BAD_PARAMS, 400)
+        return view(data, *args, **kwargs)
+    return wrapper
+
+
+def _parse_uint(value: Any) -> Optional[int]:
+    """解析非负整数参数（整数或纯数字字符串），无效时返回None，不经过异常处理"""
+    if type(value) is int:
+        return value if value >= 0 else None
+    if isinstance(value, str):
+        value = value.strip()
+        if value.isascii() and value.isdigit():
+            return int(value)
+    return None
+
+
+def _positive_id(value: Any) -> Optional[int]:
+    """解析正整数ID，无效时返回None"""
+    return _parse_uint(value) or None
+
+
+def _id_list(values: Any) -> Optional[List[int]]:
+    """解析ID列表（忽略空值），不是列表或包含无效ID时返回None"""
+    if not values:
+        return []
+    if not isinstance(values, list):
+        return None
+    ids = [_positive_id(value) for value in values if value]
+    return None if None in ids else ids
+
+
+def _sessions_scope(user_id: int) -> str:
+    """用户会话列表的缓存作用域"""
+    return f"search:sessions:{user_id}"
+
+
+def _history_scope(session_id: int) -> str:
+    """会话聊天历史的缓存作用域（新消息写入时整体失效）"""
+    return f"search:history:{session_id}"
+
+
+def _suggestions_scope(user_id: int) -> str:
+    """用户搜索建议的缓存作用域（产生新的搜索历史时整体失效）"""
+    return f"search:suggestions:{user_id}"
+
+
+def _sse_event(payload: Dict[str, Any]) -> bytes:
+    """构造一条SSE data事件"""
+    return b'data: ' + dumps_plain(payload) + b'\n\n'
+
+
+# 流式检索中内容固定的事件，模块加载时预先序列化
+_SSE_START = _sse_event({'type': 'start', 'message': '开始检索...'})
+_SSE_PROGRESS = _sse_event({'type': 'progress', 'message': '正在搜索相关内容...'})
+_SSE_DONE = _sse_event({'type': 'done', 'message': '回答完成'})
+_SSE_ERROR = _sse_event({'type': 'error', 'message': '检索失败，请稍后重试'})
+
+# 回答内容事件的固定前后缀，每个分片只需序列化内容字符串
+_SSE_CONTENT_PREFIX = b'data: {"type":"content","content":'
+_SSE_CONTENT_SUFFIX = b'}\n\n'
+
+
+def _cached_response(scope: str, field: str, ttl: float):
+    """读取缓存的JSON响应，未命中时返回None"""
+    body = response_cache.get(scope, field, ttl)
+    if body is None:
+        return None
+    return current_app.response_class(body, mimetype='application/json')
+
+
+def _cache_response(response, scope: str, field: str):
+    """缓存成功的JSON响应并原样返回"""
+    response_cache.set(scope, field, response.get_data())
+    return response
+
 
 @search_bp.route('/session/create', methods=['POST'])
-def create_session():
+@_handle_errors("创建会话接口错误")
+@_json_request
+def create_session(data: Dict[str, Any]):
     """
     创建对话会话接口
     
@@ -36,64 +185,40 @@ def create_session():
     Returns:
         JSON响应包含会话信息
     """
-    try:
-        # 获取请求数据
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                'success': False,
-                'message': '请求数据为空',
-                'code': 400
-            }), 400
-            
-        user_id = data.get('user_id')
-        session_name = data.get('session_name', '').strip()
-        
-        # 参数验证
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'message': '用户ID不能为空',
-                'code': 400
-            }), 400
-            
-        try:
-            user_id = int(user_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '用户ID格式错误',
-                'code': 400
-            }), 400
-            
-        # 调用服务层创建会话
-        result = asyncio.run(search_service.create_chat_session(user_id, session_name))
-        
-        if result['success']:
-            return jsonify({
-                'success': True,
-                'message': '会话创建成功',
-                'data': result['data'],
-                'code': 200
-            }), 200
-        else:
-            return jsonify({
-                'success': False,
-                'message': result['message'],
-                'code': 400
-            }), 400
-            
-    except Exception as e:
-        logger.error(f"创建会话接口错误: {e}")
-        return jsonify({
+    user_id = data.get('user_id')
+    session_name = data.get('session_name', '').strip()
+    
+    # 参数验证
+    if not user_id:
+        return error_response(_ERR_EMPTY_USER, 400)
+        
+    user_id = _positive_id(user_id)
+    if user_id is None:
+        return error_response(_ERR_BAD_USER, 400)
+        
+    # 调用服务层创建会话
+    result = run_async(search_service.create_chat_session(user_id, session_name))
+    
+    if result['success']:
+        response_cache.invalidate(_sessions_scope(user_id))
+        return json_response({
+            'success': True,
+            'message': '会话创建成功',
+            'data': result['data'],
+            'code': 200
+        })
+    else:
+        return json_response({
             'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+            'message': result['message'],
+            'code': 400
+        }, 400)
 
 
 @search_bp.route('/query', methods=['POST'])
-def search_query():
+@_handle_errors("智能检索接口错误")
+@_json_request
+def search_query(data: Dict[str, Any]):
     """
     智能检索问答接口
     
@@ -106,83 +231,50 @@ def search_query():
     Returns:
         JSON响应包含回答结果
     """
-    try:
-        # 获取请求数据
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                'success': False,
-                'message': '请求数据为空',
-                'code': 400
-            }), 400
-            
-        session_id = data.get('session_id')
-        user_id = data.get('user_id')
-        query = data.get('query', '').strip()
-        file_ids = data.get('file_ids', [])
-        
-        # 参数验证
-        if not session_id:
-            return jsonify({
-                'success': False,
-                'message': '会话ID不能为空',
-                'code': 400
-            }), 400
-            
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'message': '用户ID不能为空',
-                'code': 400
-            }), 400
-            
-        if not query:
-            return jsonify({
-                'success': False,
-                'message': '查询问题不能为空',
-                'code': 400
-            }), 400
-            
-        try:
-            session_id = int(session_id)
-            user_id = int(user_id)
-            if file_ids:
-                file_ids = [int(fid) for fid in file_ids if fid]
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '参数格式错误',
-                'code': 400
-            }), 400
-            
-        # 调用服务层进行智能检索
-        result = asyncio.run(search_service.search_and_answer(session_id, user_id, query, file_ids))
-        
-        if result['success']:
-            return jsonify({
-                'success': True,
-                'message': '检索成功',
-                'data': result['data'],
-                'code': 200
-            }), 200
-        else:
-            return jsonify({
-                'success': False,
-                'message': result['message'],
-                'code': 400
-            }), 400
-            
-    except Exception as e:
-        logger.error(f"智能检索接口错误: {e}")
-        return jsonify({
+    session_id = data.get('session_id')
+    user_id = data.get('user_id')
+    query = data.get('query', '').strip()
+    file_ids = data.get('file_ids', [])
+    
+    # 参数验证
+    if not session_id:
+        return error_response(_ERR_EMPTY_SESSION_ID, 400)
+        
+    if not user_id:
+        return error_response(_ERR_EMPTY_USER, 400)
+        
+    if not query:
+        return error_response(_ERR_EMPTY_QUERY, 400)
+        
+    session_id = _positive_id(session_id)
+    user_id = _positive_id(user_id)
+    file_ids = _id_list(file_ids)
+    if session_id is None or user_id is None or file_ids is None:
+        return error_response(_ERR_BAD_PARAMS, 400)
+        
+    # 调用服务层进行智能检索
+    result = run_async(search_service.search_and_answer(session_id, user_id, query, file_ids))
+    response_cache.invalidate(_history_scope(session_id), _suggestions_scope(user_id))
+    
+    if result['success']:
+        return json_response({
+            'success': True,
+            'message': '检索成功',
+            'data': result['data'],
+            'code': 200
+        })
+    else:
+        return json_response({
             'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+            'message': result['message'],
+            'code': 400
+        }, 400)
 
 
 @search_bp.route('/stream', methods=['POST'])
-def search_stream():
+@_handle_errors("流式检索接口错误")
+@_json_request
+def search_stream(data: Dict[str, Any]):
     """
     流式智能检索问答接口
     
@@ -195,88 +287,57 @@ def search_stream():
     Returns:
         流式响应
     """
-    try:
-        # 获取请求数据
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                'success': False,
-                'message': '请求数据为空',
-                'code': 400
-            }), 400
-            
-        session_id = data.get('session_id')
-        user_id = data.get('user_id')
-        query = data.get('query', '').strip()
-        file_ids = data.get('file_ids', [])
-        
-        # 参数验证
-        if not session_id or not user_id or not query:
-            return jsonify({
-                'success': False,
-                'message': '必要参数不能为空',
-                'code': 400
-            }), 400
-            
+    session_id = data.get('session_id')
+    user_id = data.get('user_id')
+    query = data.get('query', '').strip()
+    file_ids = data.get('file_ids', [])
+    
+    # 参数验证
+    if not session_id or not user_id or not query:
+        return error_response(_ERR_MISSING_PARAMS, 400)
+        
+    session_id = _positive_id(session_id)
+    user_id = _positive_id(user_id)
+    file_ids = _id_list(file_ids)
+    if session_id is None or user_id is None or file_ids is None:
+        return error_response(_ERR_BAD_PARAMS, 400)
+        
+    # 流式生成器函数（回答内容随大语言模型的生成逐段推送）
+    def generate_stream():
+        failed = False
         try:
-            session_id = int(session_id)
-            user_id = int(user_id)
-            if file_ids:
-                file_ids = [int(fid) for fid in file_ids if fid]
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '参数格式错误',
-                'code': 400
-            }), 400
-            
-        # 流式生成器函数
-        def generate_stream():
-            try:
-                # 发送开始信号
-                yield f"data: {json.dumps({'type': 'start', 'message': '开始检索...'})}\n\n"
-                
-                # 发送检索进度
-                yield f"data: {json.dumps({'type': 'progress', 'message': '正在搜索相关内容...'})}\n\n"
-                
-                # 执行检索
-                result = asyncio.run(search_service.search_and_answer(session_id, user_id, query, file_ids))
-                
-                if result['success']:
-                    # 发送回答内容（模拟逐字输出）
-                    answer = result['data']['answer']
-                    chunk_size = 10  # 每次发送10个字符
-                    
-                    for i in range(0, len(answer), chunk_size):
-                        chunk = answer[i:i+chunk_size]
-                        yield f"data: {json.dumps({'type': 'content', 'content': chunk})}\n\n"
-                        
-                    # 发送来源信息
-                    sources = result['data'].get('sources', [])
-                    if sources:
-                        yield f"data: {json.dumps({'type': 'sources', 'sources': sources})}\n\n"
-                        
-                    # 发送完成信号
-                    yield f"data: {json.dumps({'type': 'done', 'message': '回答完成'})}\n\n"
+            # 发送开始信号和检索进度
+            yield _SSE_START
+            yield _SSE_PROGRESS
+            
+            events = search_service.stream_search_and_answer(session_id, user_id, query, file_ids)
+            for event in iterate_async(events):
+                if event['type'] == 'content':
+                    yield _SSE_CONTENT_PREFIX + dumps_plain(event['content']) + _SSE_CONTENT_SUFFIX
                 else:
-                    yield f"data: {json.dumps({'type': 'error', 'message': result['message']})}\n\n"
+                    failed = failed or event['type'] == 'error'
+                    yield _sse_event(event)
                     
-            except Exception as e:
-                logger.error(f"流式检索错误: {e}")
-                yield f"data: {json.dumps({'type': 'error', 'message': f'检索失败: {str(e)}'})}\n\n"
+            # 发送完成信号
+            if not failed:
+                yield _SSE_DONE
                 
-        return Response(generate_stream(), mimetype='text/plain')
-        
-    except Exception as e:
-        logger.error(f"流式检索接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+        except Exception:
+            logger.exception("流式检索错误")
+            yield _SSE_ERROR
+        finally:
+            response_cache.invalidate(_history_scope(session_id), _suggestions_scope(user_id))
+            
+    # SSE响应：禁止缓存和Nginx缓冲，使每个分片立即到达客户端
+    return Response(
+        generate_stream(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 @search_bp.route('/history/<int:session_id>', methods=['GET'])
+@_handle_errors("获取聊天历史接口错误")
 def get_chat_history(session_id: int):
     """
     获取聊天历史接口
@@ -292,64 +353,53 @@ def get_chat_history(session_id: int):
     Returns:
         JSON响应包含聊天历史
     """
-    try:
-        # 获取查询参数
-        user_id = request.args.get('user_id')
-        page = request.args.get('page', 1)
-        page_size = request.args.get('page_size', 20)
-        
-        # 参数验证
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'message': '用户ID不能为空',
-                'code': 400
-            }), 400
-            
-        try:
-            user_id = int(user_id)
-            page = int(page)
-            page_size = int(page_size)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '参数格式错误',
-                'code': 400
-            }), 400
-            
-        # 参数范围检查
-        if page < 1:
-            page = 1
-        if page_size < 1 or page_size > 100:
-            page_size = 20
-            
-        # 调用服务层获取聊天历史
-        result = asyncio.run(search_service.get_chat_history(session_id, user_id, page, page_size))
-        
-        if result['success']:
-            return jsonify({
-                'success': True,
-                'message': '获取聊天历史成功',
-                'data': result['data'],
-                'code': 200
-            }), 200
-        else:
-            return jsonify({
-                'success': False,
-                'message': result['message'],
-                'code': 400
-            }), 400
-            
-    except Exception as e:
-        logger.error(f"获取聊天历史接口错误: {e}")
-        return jsonify({
+    # 获取查询参数
+    user_id = request.args.get('user_id')
+    page = request.args.get('page', 1)
+    page_size = request.args.get('page_size', 20)
+    
+    # 参数验证
+    if not user_id:
+        return error_response(_ERR_EMPTY_USER, 400)
+        
+    user_id = _positive_id(user_id)
+    page = _parse_uint(page)
+    page_size = _parse_uint(page_size)
+    if user_id is None or page is None or page_size is None:
+        return error_response(_ERR_BAD_PARAMS, 400)
+        
+    # 参数范围检查
+    if page < 1:
+        page = 1
+    if page_size < 1 or page_size > 100:
+        page_size = 20
+        
+    # 优先返回缓存的响应（缓存项区分用户，只有会话所有者的成功响应会被缓存）
+    cache_field = f"{user_id}:{page}:{page_size}"
+    cached = _cached_response(_history_scope(session_id), cache_field, cache_settings.get('history_ttl', 120))
+    if cached is not None:
+        return cached
+        
+    # 调用服务层获取聊天历史
+    result = run_async(search_service.get_chat_history(session_id, user_id, page, page_size))
+    
+    if result['success']:
+        return _cache_response(json_response({
+            'success': True,
+            'message': '获取聊天历史成功',
+            'data': result['data'],
+            'code': 200
+        }), _history_scope(session_id), cache_field)
+    else:
+        return json_response({
             'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+            'message': result['message'],
+            'code': 400
+        }, 400)
 
 
 @search_bp.route('/sessions', methods=['GET'])
+@_handle_errors("获取会话列表接口错误")
 def get_user_sessions():
     """
     获取用户会话列表接口
@@ -360,54 +410,42 @@ def get_user_sessions():
     Returns:
         JSON响应包含会话列表
     """
-    try:
-        # 获取查询参数
-        user_id = request.args.get('user_id')
-        
-        # 参数验证
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'message': '用户ID不能为空',
-                'code': 400
-            }), 400
-            
-        try:
-            user_id = int(user_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '用户ID格式错误',
-                'code': 400
-            }), 400
-            
-        # 调用服务层获取会话列表
-        result = asyncio.run(search_service.get_user_sessions(user_id))
-        
-        if result['success']:
-            return jsonify({
-                'success': True,
-                'message': '获取会话列表成功',
-                'data': result['data'],
-                'code': 200
-            }), 200
-        else:
-            return jsonify({
-                'success': False,
-                'message': result['message'],
-                'code': 400
-            }), 400
-            
-    except Exception as e:
-        logger.error(f"获取会话列表接口错误: {e}")
-        return jsonify({
+    # 获取查询参数
+    user_id = request.args.get('user_id')
+    
+    # 参数验证
+    if not user_id:
+        return error_response(_ERR_EMPTY_USER, 400)
+        
+    user_id = _positive_id(user_id)
+    if user_id is None:
+        return error_response(_ERR_BAD_USER, 400)
+        
+    # 优先返回缓存的响应
+    cached = _cached_response(_sessions_scope(user_id), 'list', cache_settings.get('sessions_ttl', 30))
+    if cached is not None:
+        return cached
+        
+    # 调用服务层获取会话列表
+    result = run_async(search_service.get_user_sessions(user_id))
+    
+    if result['success']:
+        return _cache_response(json_response({
+            'success': True,
+            'message': '获取会话列表成功',
+            'data': result['data'],
+            'code': 200
+        }), _sessions_scope(user_id), 'list')
+    else:
+        return json_response({
             'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+            'message': result['message'],
+            'code': 400
+        }, 400)
 
 
 @search_bp.route('/session/delete/<int:session_id>', methods=['DELETE'])
+@_handle_errors("删除会话接口错误")
 def delete_session(session_id: int):
     """
     删除会话接口
@@ -421,70 +459,43 @@ def delete_session(session_id: int):
     Returns:
         JSON响应包含删除结果
     """
+    # 获取用户ID
+    user_id = request.args.get('user_id')
+    
+    # 参数验证
+    if not user_id:
+        return error_response(_ERR_EMPTY_USER, 400)
+        
+    user_id = _positive_id(user_id)
+    if user_id is None:
+        return error_response(_ERR_BAD_USER, 400)
+        
+    # 删除会话（标记为删除状态），权限验证合并在更新条件中，未更新任何行说明会话不存在或无权限
     try:
-        # 获取用户ID
-        user_id = request.args.get('user_id')
-        
-        # 参数验证
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'message': '用户ID不能为空',
-                'code': 400
-            }), 400
-            
-        try:
-            user_id = int(user_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '用户ID格式错误',
-                'code': 400
-            }), 400
-            
-        # 验证会话权限
-        session_valid = asyncio.run(search_service._validate_session(session_id, user_id))
-        if not session_valid:
-            return jsonify({
-                'success': False,
-                'message': '会话不存在或无权限访问',
-                'code': 403
-            }), 403
-            
-        # 删除会话（标记为删除状态）
-        try:
-            connection = search_service.get_db_connection()
-            with connection.cursor() as cursor:
-                sql = "UPDATE chat_sessions SET session_status = 'deleted' WHERE id = %s"
-                cursor.execute(sql, (session_id,))
-                
-            connection.close()
-            
-            return jsonify({
-                'success': True,
-                'message': '会话删除成功',
-                'code': 200
-            }), 200
-            
-        except Exception as e:
-            logger.error(f"删除会话数据库操作失败: {e}")
-            return jsonify({
-                'success': False,
-                'message': '删除会话失败',
-                'code': 500
-            }), 500
-            
+        connection = search_service.get_db_connection()
+        with connection.cursor() as cursor:
+            sql = """
+            UPDATE chat_sessions SET session_status = 'deleted' 
+            WHERE id = %s AND user_id = %s AND session_status = 'active'
+            """
+            updated = cursor.execute(sql, (session_id, user_id))
+            
+        connection.close()
+        if not updated:
+            return error_response(_ERR_SESSION_FORBIDDEN, 403)
+        response_cache.invalidate(_sessions_scope(user_id), _history_scope(session_id))
+        
+        return precompiled_response(_OK_SESSION_DELETED)
+        
     except Exception as e:
-        logger.error(f"删除会话接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+        logger.error(f"删除会话数据库操作失败: {e}")
+        return error_response(_ERR_DELETE_SESSION_FAILED, 500)
 
 
 @search_bp.route('/session/rename/<int:session_id>', methods=['PUT'])
-def rename_session(session_id: int):
+@_handle_errors("重命名会话接口错误")
+@_json_request
+def rename_session(data: Dict[str, Any], session_id: int):
     """
     重命名会话接口
     
@@ -498,90 +509,52 @@ def rename_session(session_id: int):
     Returns:
         JSON响应包含重命名结果
     """
+    user_id = data.get('user_id')
+    new_name = data.get('new_name', '').strip()
+    
+    # 参数验证
+    if not user_id:
+        return error_response(_ERR_EMPTY_USER, 400)
+        
+    if not new_name:
+        return error_response(_ERR_EMPTY_NEW_NAME, 400)
+        
+    user_id = _positive_id(user_id)
+    if user_id is None:
+        return error_response(_ERR_BAD_USER, 400)
+        
+    # 重命名会话，权限验证合并在更新条件中
     try:
-        # 获取请求数据
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                'success': False,
-                'message': '请求数据为空',
-                'code': 400
-            }), 400
-            
-        user_id = data.get('user_id')
-        new_name = data.get('new_name', '').strip()
-        
-        # 参数验证
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'message': '用户ID不能为空',
-                'code': 400
-            }), 400
-            
-        if not new_name:
-            return jsonify({
-                'success': False,
-                'message': '新会话名称不能为空',
-                'code': 400
-            }), 400
-            
-        try:
-            user_id = int(user_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '用户ID格式错误',
-                'code': 400
-            }), 400
-            
-        # 验证会话权限
-        session_valid = asyncio.run(search_service._validate_session(session_id, user_id))
-        if not session_valid:
-            return jsonify({
-                'success': False,
-                'message': '会话不存在或无权限访问',
-                'code': 403
-            }), 403
-            
-        # 重命名会话
-        try:
-            connection = search_service.get_db_connection()
-            with connection.cursor() as cursor:
-                sql = """
-                UPDATE chat_sessions 
-                SET session_name = %s, updated_at = %s 
-                WHERE id = %s
-                """
-                from datetime import datetime
-                cursor.execute(sql, (new_name, datetime.now(), session_id))
-                
-            connection.close()
-            
-            return jsonify({
-                'success': True,
-                'message': '会话重命名成功',
-                'code': 200
-            }), 200
-            
-        except Exception as e:
-            logger.error(f"重命名会话数据库操作失败: {e}")
-            return jsonify({
-                'success': False,
-                'message': '重命名会话失败',
-                'code': 500
-            }), 500
-            
+        connection = search_service.get_db_connection()
+        with connection.cursor() as cursor:
+            sql = """
+            UPDATE chat_sessions 
+            SET session_name = %s, updated_at = NOW() 
+            WHERE id = %s AND user_id = %s AND session_status = 'active'
+            """
+            updated = cursor.execute(sql, (new_name, session_id, user_id))
+            if not updated:
+                # 名称和更新时间均未变化时影响行数同样为0，仅在这种情况下再确认会话是否存在
+                cursor.execute(
+                    "SELECT 1 FROM chat_sessions WHERE id = %s AND user_id = %s AND session_status = 'active'",
+                    (session_id, user_id)
+                )
+                updated = cursor.fetchone() is not None
+            
+        connection.close()
+        if not updated:
+            return error_response(_ERR_SESSION_FORBIDDEN, 403)
+        response_cache.invalidate(_sessions_scope(user_id))
+        
+        return precompiled_response(_OK_SESSION_RENAMED)
+        
     except Exception as e:
-        logger.error(f"重命名会话接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+        logger.error(f"重命名会话数据库操作失败: {e}")
+        return error_response(_ERR_RENAME_SESSION_FAILED, 500)
 
 
 @search_bp.route('/suggestions', methods=['GET'])
+@_handle_errors("获取搜索建议接口错误")
 def get_search_suggestions():
     """
     获取搜索建议接口
@@ -594,122 +567,113 @@ def get_search_suggestions():
     Returns:
         JSON响应包含搜索建议
     """
-    try:
-        # 获取查询参数
-        user_id = request.args.get('user_id')
-        keyword = request.args.get('keyword', '').strip()
-        limit = request.args.get('limit', 5)
-        
-        # 参数验证
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'message': '用户ID不能为空',
-                'code': 400
-            }), 400
-            
-        if not keyword:
-            return jsonify({
-                'success': False,
-                'message': '关键词不能为空',
-                'code': 400
-            }), 400
-            
-        try:
-            user_id = int(user_id)
-            limit = int(limit)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '参数格式错误',
-                'code': 400
-            }), 400
-            
-        # 限制建议数量
-        limit = min(max(limit, 1), 20)
+    # 获取查询参数
+    user_id = request.args.get('user_id')
+    keyword = request.args.get('keyword', '').strip()
+    limit = request.args.get('limit', 5)
+    
+    # 参数验证
+    if not user_id:
+        return error_response(_ERR_EMPTY_USER, 400)
         
-        # 获取搜索建议（简单实现）
-        suggestions = []
+    if not keyword:
+        return error_response(_ERR_EMPTY_KEYWORD, 400)
         
-        try:
-            connection = search_service.get_db_connection()
-            with connection.cursor() as cursor:
-                # 从搜索历史中获取相似查询
-                sql = """
-                SELECT DISTINCT search_query 
+    user_id = _positive_id(user_id)
+    limit = _parse_uint(limit)
+    if user_id is None or limit is None:
+        return error_response(_ERR_BAD_PARAMS, 400)
+        
+    # 限制建议数量
+    limit = min(max(limit, 1), 20)
+    
+    # 自动补全请求随输入频繁发出（输入、删除时重复相同的前缀），优先返回缓存的建议，每次只需一次Redis读取
+    cache_field = f"{limit}:{keyword}"
+    cached = _cached_response(_suggestions_scope(user_id), cache_field, cache_settings.get('suggestions_ttl', 60))
+    if cached is not None:
+        return cached
+        
+    # 同时进行的查询已达上限时直接返回空建议，避免占满数据库连接
+    if not _suggestion_slots.acquire(blocking=False):
+        return precompiled_response(_EMPTY_SUGGESTIONS)
+        
+    # 获取搜索建议（简单实现）
+    like_keyword = keyword.translate(_LIKE_ESCAPE)
+    
+    try:
+        connection = search_service.get_db_connection()
+        with connection.cursor() as cursor:
+            # 一次查询同时取两类建议，搜索历史优先，不足的部分由文档内容补足：
+            # - 搜索历史中以关键词开头的查询，按最近使用排序（前缀匹配可使用 (user_id, search_query) 索引）
+            # - 文档内容中包含关键词的句子，在数据库中截取（以第一次出现位置为准，向前后扩展到句号），只返回较短的句子
+            sql = """
+            (
+                SELECT search_query AS suggestion, 0 AS source, MAX(created_at) AS last_used
                 FROM search_history 
                 WHERE user_id = %s 
                 AND search_query LIKE %s 
-                ORDER BY created_at DESC 
+                GROUP BY search_query 
+                ORDER BY last_used DESC 
                 LIMIT %s
-                """
-                cursor.execute(sql, (user_id, f'%{keyword}%', limit))
-                history_results = cursor.fetchall()
-                
-                suggestions.extend([r['search_query'] for r in history_results])
-                
-                # 如果历史记录不够，从文档内容中获取相关关键词
-                if len(suggestions) < limit:
-                    remaining = limit - len(suggestions)
-                    sql = """
-                    SELECT DISTINCT dc.content_text 
+            )
+            UNION ALL
+            (
+                SELECT DISTINCT sentence, 1, NULL FROM (
+                    SELECT TRIM(CONCAT(
+                        SUBSTRING_INDEX(SUBSTRING(dc.content_text, 1, LOCATE(%s, dc.content_text) - 1), '。', -1),
+                        SUBSTRING_INDEX(SUBSTRING(dc.content_text, LOCATE(%s, dc.content_text)), '。', 1)
+                    )) AS sentence
                     FROM document_contents dc
                     JOIN files f ON dc.file_id = f.id
                     WHERE f.user_id = %s 
                     AND dc.content_text LIKE %s 
                     AND dc.content_type = 'text'
-                    LIMIT %s
-                    """
-                    cursor.execute(sql, (user_id, f'%{keyword}%', remaining))
-                    content_results = cursor.fetchall()
-                    
-                    # 从内容中提取相关短语
-                    for result in content_results:
-                        content = result['content_text']
-                        if content and keyword in content:
-                            # 简单提取包含关键词的句子
-                            sentences = content.split('。')
-                            for sentence in sentences:
-                                if keyword in sentence and len(sentence.strip()) < 50:
-                                    suggestions.append(sentence.strip() + '？')
-                                    if len(suggestions) >= limit:
-                                        break
-                            if len(suggestions) >= limit:
-                                break
-                                
-            connection.close()
-            
-            # 去重并限制数量
-            unique_suggestions = list(dict.fromkeys(suggestions))[:limit]
-            
-            return jsonify({
-                'success': True,
-                'message': '获取搜索建议成功',
-                'data': {
-                    'suggestions': unique_suggestions,
-                    'count': len(unique_suggestions)
-                },
-                'code': 200
-            }), 200
-            
-        except Exception as e:
-            logger.error(f"获取搜索建议数据库操作失败: {e}")
-            return jsonify({
-                'success': False,
-                'message': '获取搜索建议失败',
-                'code': 500
-            }), 500
-            
+                ) matched
+                WHERE sentence <> '' AND CHAR_LENGTH(sentence) < 50
+                LIMIT %s
+            )
+            ORDER BY source, last_used DESC
+            LIMIT %s
+            """
+            cursor.execute(sql, (
+                user_id, f'{like_keyword}%', limit,
+                keyword, keyword, user_id, f'%{like_keyword}%', limit,
+                limit
+            ))
+            
+            # 文档内容中的句子以问句形式给出；取结果时顺带去重，达到数量上限即停止
+            unique_suggestions = []
+            seen = set()
+            for r in cursor.fetchall():
+                suggestion = r['suggestion'] + '？' if r['source'] else r['suggestion']
+                if suggestion in seen:
+                    continue
+                seen.add(suggestion)
+                unique_suggestions.append(suggestion)
+                if len(unique_suggestions) >= limit:
+                    break
+            
+        connection.close()
+        
+        return _cache_response(json_response({
+            'success': True,
+            'message': '获取搜索建议成功',
+            'data': {
+                'suggestions': unique_suggestions,
+                'count': len(unique_suggestions)
+            },
+            'code': 200
+        }), _suggestions_scope(user_id), cache_field)
+        
     except Exception as e:
-        logger.error(f"获取搜索建议接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+        logger.error(f"获取搜索建议数据库操作失败: {e}")
+        return error_response(_ERR_SUGGESTIONS_FAILED, 500)
+    finally:
+        _suggestion_slots.release()
 
 
 @search_bp.route('/analytics', methods=['GET'])
+@_handle_errors("获取搜索分析接口错误")
 def get_search_analytics():
     """
     获取搜索分析统计接口
@@ -721,133 +685,96 @@ def get_search_analytics():
     Returns:
         JSON响应包含搜索统计信息
     """
+    # 获取查询参数
+    user_id = request.args.get('user_id')
+    days = request.args.get('days', 7)
+    
+    # 参数验证
+    if not user_id:
+        return error_response(_ERR_EMPTY_USER, 400)
+        
+    user_id = _positive_id(user_id)
+    days = _parse_uint(days)
+    if user_id is None or days is None:
+        return error_response(_ERR_BAD_PARAMS, 400)
+        
+    # 限制天数范围
+    days = min(max(days, 1), 365)
+    
+    # 获取统计信息
     try:
-        # 获取查询参数
-        user_id = request.args.get('user_id')
-        days = request.args.get('days', 7)
-        
-        # 参数验证
-        if not user_id:
-            return jsonify({
-                'success': False,
-                'message': '用户ID不能为空',
-                'code': 400
-            }), 400
-            
-        try:
-            user_id = int(user_id)
-            days = int(days)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': '参数格式错误',
-                'code': 400
-            }), 400
-            
-        # 限制天数范围
-        days = min(max(days, 1), 365)
+        from datetime import datetime, timedelta
         
-        # 获取统计信息
-        try:
-            from datetime import datetime, timedelta
-            
-            start_date = datetime.now() - timedelta(days=days)
-            
-            connection = search_service.get_db_connection()
-            with connection.cursor() as cursor:
-                # 搜索次数统计
-                sql = """
+        start_date = datetime.now() - timedelta(days=days)
+        
+        connection = search_service.get_db_connection()
+        with connection.cursor() as cursor:
+            # 搜索次数统计和活跃会话数（一次查询返回）
+            sql = """
+            SELECT sh.search_count, sh.avg_response_time,
+                   (SELECT COUNT(DISTINCT cm.session_id)
+                    FROM chat_messages cm
+                    JOIN chat_sessions cs ON cm.session_id = cs.id
+                    WHERE cs.user_id = %s AND cm.created_at >= %s) as active_sessions
+            FROM (
                 SELECT COUNT(*) as search_count, 
                        AVG(response_time) as avg_response_time
                 FROM search_history 
                 WHERE user_id = %s AND created_at >= %s
-                """
-                cursor.execute(sql, (user_id, start_date))
-                search_stats = cursor.fetchone()
-                
-                # 热门查询词
-                sql = """
-                SELECT search_query, COUNT(*) as count
-                FROM search_history 
-                WHERE user_id = %s AND created_at >= %s
-                GROUP BY search_query 
-                ORDER BY count DESC 
-                LIMIT 10
-                """
-                cursor.execute(sql, (user_id, start_date))
-                popular_queries = cursor.fetchall()
-                
-                # 活跃会话数
-                sql = """
-                SELECT COUNT(DISTINCT session_id) as active_sessions
-                FROM chat_messages cm
-                JOIN chat_sessions cs ON cm.session_id = cs.id
-                WHERE cs.user_id = %s AND cm.created_at >= %s
-                """
-                cursor.execute(sql, (user_id, start_date))
-                session_stats = cursor.fetchone()
-                
-            connection.close()
-            
-            analytics = {
-                'search_count': search_stats['search_count'] or 0,
-                'avg_response_time': round(search_stats['avg_response_time'] or 0, 2),
-                'active_sessions': session_stats['active_sessions'] or 0,
-                'popular_queries': popular_queries,
-                'period_days': days
-            }
-            
-            return jsonify({
-                'success': True,
-                'message': '获取搜索分析成功',
-                'data': analytics,
-                'code': 200
-            }), 200
-            
-        except Exception as e:
-            logger.error(f"获取搜索分析数据库操作失败: {e}")
-            return jsonify({
-                'success': False,
-                'message': '获取搜索分析失败',
-                'code': 500
-            }), 500
-            
+            ) sh
+            """
+            cursor.execute(sql, (user_id, start_date, user_id, start_date))
+            stats = cursor.fetchone()
+            
+            # 热门查询词
+            sql = """
+            SELECT search_query, COUNT(*) as count
+            FROM search_history 
+            WHERE user_id = %s AND created_at >= %s
+            GROUP BY search_query 
+            ORDER BY count DESC 
+            LIMIT 10
+            """
+            cursor.execute(sql, (user_id, start_date))
+            popular_queries = cursor.fetchall()
+            
+        connection.close()
+        
+        analytics = {
+            'search_count': stats['search_count'] or 0,
+            'avg_response_time': round(stats['avg_response_time'] or 0, 2),
+            'active_sessions': stats['active_sessions'] or 0,
+            'popular_queries': popular_queries,
+            'period_days': days
+        }
+        
+        return json_response({
+            'success': True,
+            'message': '获取搜索分析成功',
+            'data': analytics,
+            'code': 200
+        })
+        
     except Exception as e:
-        logger.error(f"获取搜索分析接口错误: {e}")
-        return jsonify({
-            'success': False,
-            'message': f'服务器内部错误: {str(e)}',
-            'code': 500
-        }), 500
+        logger.error(f"获取搜索分析数据库操作失败: {e}")
+        return error_response(_ERR_ANALYTICS_FAILED, 500)
 
 
 # 错误处理
 @search_bp.errorhandler(404)
 def not_found(error):
     """404错误处理"""
-    return jsonify({
-        'success': False,
-        'message': '接口不存在',
-        'code': 404
-    }), 404
+    return error_response(_ERR_NOT_FOUND_API, 404)
 
 
 @search_bp.errorhandler(405)
 def method_not_allowed(error):
     """405错误处理"""
-    return jsonify({
-        'success': False,
-        'message': '请求方法不允许',
-        'code': 405
-    }), 405
+    return error_response(_ERR_METHOD_NOT_ALLOWED, 405)
 
 
 @search_bp.errorhandler(500)
 def internal_server_error(error):
     """500错误处理"""
     logger.error(f"内部服务器错误: {error}")
-    return jsonify({
-        'success': False,
-        'message': '服务器内部错误',
-        'code': 500
-    }), 500 
\ No newline at end of file
+    return error_response(_ERR_INTERNAL, 500) 
\ No newline at end of file
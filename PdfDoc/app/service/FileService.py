@@ -5,11 +5,17 @@
 负责处理PDF文件的上传、删除、重命名、内容提取等功能
 """
 
+import io
 import os
+import re
+import errno
+import mmap
 import uuid
 import hashlib
 import asyncio
 import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
@@ -34,6 +40,18 @@ except ImportError:
 # 配置加载
 import yaml
 
+# 处理进度推送、接口响应缓存
+from ..utils.progress import ProgressChannel
+from ..utils.cache import ResponseCache
+from ..utils.async_runner import run_async
+
+# 异步文件IO
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
+
 # 任务队列相关
 try:
     from celery import Celery
@@ -41,6 +59,167 @@ try:
 except ImportError:
     CELERY_AVAILABLE = False
 
+# 文件锁 (仅POSIX，用于防止同一分块上传会话被并发写入)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+# 批量删除时每条SQL包含的最大ID数量，避免IN列表过长
+BULK_DELETE_CHUNK_SIZE = 500
+
+
+def file_cache_scope(user_id: int) -> str:
+    """用户文件数据（文件列表、文件信息等）的接口缓存作用域"""
+    return f"file:{user_id}"
+
+
+
+# 文件列表查询的字段
+FILE_LIST_COLUMNS = (
+    "id, original_name, file_size, upload_status, process_status, "
+    "process_progress, content_extracted, indexed, created_at, updated_at"
+)
+
+# MySQL错误码: 找不到与列匹配的FULLTEXT索引
+ER_FT_MATCHING_KEY_NOT_FOUND = 1191
+
+# 全文索引ngram分词长度 (与MySQL的ngram_token_size一致)，短于该长度的关键词无法通过全文索引匹配
+NGRAM_TOKEN_SIZE = 2
+
+# 布尔全文检索中有特殊含义的字符
+_FULLTEXT_OPERATORS_RE = re.compile(r'[+\-<>()~*"@]+')
+
+# LIKE模式中需要转义的字符
+_LIKE_ESCAPE_RE = re.compile(r'([\\%_])')
+
+
+def _fulltext_query(keyword: str) -> Optional[str]:
+    """
+    将搜索关键词转换为布尔模式全文检索表达式，每个词都必须出现
+    关键词为空或包含短于ngram分词长度的词时返回None，由调用方回退为LIKE匹配
+    """
+    terms = _FULLTEXT_OPERATORS_RE.sub(' ', keyword).split()
+    if not terms or any(len(term) < NGRAM_TOKEN_SIZE for term in terms):
+        return None
+    return ' '.join(f'+"{term}"' for term in terms)
+
+
+def _escape_like(keyword: str) -> str:
+    """转义LIKE模式中的通配符"""
+    return _LIKE_ESCAPE_RE.sub(r'\\\1', keyword)
+
+
+def _disk_fileno(stream) -> Optional[int]:
+    """返回已落盘文件流的文件描述符，内存中的流返回None（不会触发SpooledTemporaryFile落盘）"""
+    if isinstance(stream, tempfile.SpooledTemporaryFile):
+        if not stream._rolled:
+            return None
+        stream = stream._file
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _copy_upload_fd(source_fd: int, file_path: Path, max_size: int) -> Tuple[str, int]:
+    """
+    在内核中将已落盘的上传内容复制到目标文件 (copy_file_range，不经过用户态缓冲区)
+    MD5通过mmap直接读取页缓存计算；超过大小上限时不复制，返回的大小大于上限
+    """
+    offset = os.lseek(source_fd, 0, os.SEEK_CUR)
+    file_size = os.fstat(source_fd).st_size - offset
+    if file_size > max_size:
+        return '', file_size
+        
+    file_hash = hashlib.md5()
+    if file_size > 0:
+        with mmap.mmap(source_fd, offset + file_size, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view, view[offset:] as body:
+                file_hash.update(body)
+            
+    with open(file_path, 'wb') as f:
+        copied = 0
+        use_copy_file_range = True
+        while copied < file_size:
+            if use_copy_file_range:
+                try:
+                    n = os.copy_file_range(source_fd, f.fileno(), file_size - copied, offset + copied)
+                except OSError as e:
+                    # 跨文件系统或内核不支持时改用sendfile
+                    if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                        raise
+                    use_copy_file_range = False
+                    continue
+            else:
+                n = os.sendfile(f.fileno(), source_fd, offset + copied, file_size - copied)
+            if n == 0:
+                break
+            copied += n
+            
+    return file_hash.hexdigest(), copied
+
+
+def _copy_upload_stream(stream, file_path: Path, max_size: int, chunk_size: int) -> Tuple[str, int]:
+    """将文件流分块写入磁盘并计算MD5，超过大小上限时停止写入，返回的大小大于上限"""
+    file_hash = hashlib.md5()
+    file_size = 0
+    with open(file_path, 'wb') as f:
+        while file_size <= max_size:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            file_hash.update(chunk)
+            file_size += len(chunk)
+            f.write(chunk)
+    return file_hash.hexdigest(), file_size
+
+
+# 分块上传会话目录（位于上传目录下，完成后可直接原子移动到上传目录）
+CHUNK_UPLOAD_DIR = '.partial'
+_UPLOAD_TOKEN_RE = re.compile(r'[0-9a-f]{32}')
+
+
+def _hash_file(file_path: Path) -> str:
+    """通过mmap计算文件的MD5"""
+    file_hash = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                file_hash.update(mapped)
+    return file_hash.hexdigest()
+
+
+def _write_chunk(part_path: Path, stream, offset: int, length: int, chunk_size: int) -> Tuple[int, int]:
+    """
+    将请求体写入分块上传的临时文件
+    写入前在文件锁内核对偏移量，偏移量与已写入大小不一致时不写入
+    
+    Returns:
+        (写入前的文件大小, 写入的字节数)
+    """
+    fd = os.open(part_path, os.O_WRONLY)
+    try:
+        if FCNTL_AVAILABLE:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        current_size = os.fstat(fd).st_size
+        if current_size != offset:
+            return current_size, 0
+            
+        written = 0
+        while written < length:
+            chunk = stream.read(min(chunk_size, length - written))
+            if not chunk:
+                # 客户端中断，已写入的部分保留，客户端可从新的偏移量继续上传
+                break
+            os.pwrite(fd, chunk, offset + written)
+            written += len(chunk)
+        return current_size, written
+    finally:
+        os.close(fd)
+
 
 class FileService:
     """文件管理服务类"""
@@ -51,6 +230,14 @@ class FileService:
         self.configs = self._load_configs()
         self.db_pool = None
         self.ocr_engine = None
+        self._fulltext_available = True
+        self.progress = ProgressChannel(self.configs.get('db', {}).get('redis', {}))
+        # 接口响应缓存，后台处理改变文件状态时同样需要使缓存失效
+        self.response_cache = ResponseCache(
+            self.configs.get('db', {}).get('redis', {}),
+            self.configs.get('config', {}).get('api_cache', {})
+        )
+        self._processing_executor = None
         self._init_ocr_engine()
         
     def _setup_logger(self) -> logging.Logger:
@@ -147,7 +334,8 @@ class FileService:
             
     async def upload_file(self, file_data: bytes, filename: str, user_id: int, original_filename: str = None) -> Dict[str, Any]:
         """
-        上传文件
+        上传文件（内存数据）
+        与流式上传共用同一写盘、校验和保存流程
         
         Args:
             file_data: 文件二进制数据
@@ -158,83 +346,321 @@ class FileService:
         Returns:
             上传结果信息
         """
+        return await self.upload_stream(io.BytesIO(file_data), filename, user_id, original_filename)
+        
+    async def upload_stream(self, stream, filename: str, user_id: int, original_filename: str = None) -> Dict[str, Any]:
+        """
+        流式上传文件
+        从文件流中分块读取并直接写入存储目录，同时计算哈希，内存占用与文件大小无关
+        
+        Args:
+            stream: 可读取的文件流（如上传文件的 file.stream）
+            filename: 安全处理后的文件名
+            user_id: 用户ID
+            original_filename: 原始文件名（用于显示）
+            
+        Returns:
+            上传结果信息
+        """
+        file_path = None
         try:
-            # 验证文件
-            validation_result = self._validate_file(file_data, filename)
-            if not validation_result['valid']:
+            file_storage_config = self.configs.get('config', {}).get('file_storage', {})
+            upload_dir = Path(file_storage_config.get('upload_dir', './uploads'))
+            upload_dir.mkdir(parents=True, exist_ok=True)
+            file_path = upload_dir / f"{uuid.uuid4().hex}{Path(filename).suffix.lower()}"
+            max_size = file_storage_config.get('max_file_size', 100) * 1024 * 1024
+            
+            file_hash, file_size = await self._write_upload_stream(file_path, stream, max_size)
+            if file_size == 0:
+                file_path.unlink(missing_ok=True)
                 return {
                     'success': False,
-                    'message': validation_result['message'],
+                    'message': '文件内容为空',
                     'file_id': None
                 }
                 
-            # 生成存储文件名
-            file_extension = Path(filename).suffix.lower()
-            stored_filename = f"{uuid.uuid4().hex}{file_extension}"
+            return await self._accept_upload(file_path, filename, user_id, original_filename,
+                                             file_size, file_hash)
+            
+        except Exception as e:
+            self.logger.error(f"文件上传失败: {e}")
+            if file_path is not None:
+                file_path.unlink(missing_ok=True)
+            return {
+                'success': False,
+                'message': f'文件上传失败: {str(e)}',
+                'file_id': None
+            }
             
-            # 计算文件哈希
-            file_hash = hashlib.md5(file_data).hexdigest()
+    def _chunk_upload_dir(self) -> Path:
+        """分块上传会话目录"""
+        file_storage_config = self.configs.get('config', {}).get('file_storage', {})
+        chunk_dir = Path(file_storage_config.get('upload_dir', './uploads')) / CHUNK_UPLOAD_DIR
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+        return chunk_dir
+        
+    def _load_upload_session(self, token: str, user_id: int) -> Optional[Dict[str, Any]]:
+        """读取分块上传会话，会话不存在或不属于该用户时返回None"""
+        if not _UPLOAD_TOKEN_RE.fullmatch(token):
+            return None
+        meta_path = self._chunk_upload_dir() / f"{token}.json"
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                session = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if session.get('user_id') != user_id:
+            return None
+        return session
+        
+    def _cleanup_upload_sessions(self, chunk_dir: Path):
+        """清理超时未完成的分块上传会话（按临时文件最后写入时间判断）"""
+        file_storage_config = self.configs.get('config', {}).get('file_storage', {})
+        expire_before = datetime.now().timestamp() - file_storage_config.get('upload_session_ttl', 24) * 3600
+        with os.scandir(chunk_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.part'):
+                    continue
+                try:
+                    if entry.stat().st_mtime < expire_before:
+                        os.unlink(entry.path)
+                        (chunk_dir / f"{entry.name[:-5]}.json").unlink(missing_ok=True)
+                except OSError:
+                    continue
+                    
+    async def init_upload(self, filename: str, user_id: int, total_size: int,
+                          original_filename: str = None) -> Dict[str, Any]:
+        """
+        创建分块上传会话
+        客户端随后按偏移量分块发送原始文件内容，无需multipart编码，中断后可从已写入的偏移量继续
+        
+        Args:
+            filename: 安全处理后的文件名
+            user_id: 用户ID
+            total_size: 文件总大小（字节）
+            original_filename: 原始文件名（用于显示）
             
-            # 检查文件是否已存在
-            existing_file = await self._check_file_exists(file_hash, user_id)
-            if existing_file:
+        Returns:
+            会话信息，包含上传令牌
+        """
+        try:
+            file_storage_config = self.configs.get('config', {}).get('file_storage', {})
+            max_size = file_storage_config.get('max_file_size', 100) * 1024 * 1024
+            if total_size <= 0:
+                return {'success': False, 'message': '文件内容为空', 'code': 400}
+            if total_size > max_size:
                 return {
                     'success': False,
-                    'message': '文件已存在',
-                    'file_id': existing_file['id']
+                    'message': f'文件大小超出限制: {total_size / 1024 / 1024:.2f}MB',
+                    'code': 413
                 }
                 
-            # 保存文件到磁盘
-            file_storage_config = self.configs.get('config', {}).get('file_storage', {})
-            upload_dir = Path(file_storage_config.get('upload_dir', './uploads'))
-            upload_dir.mkdir(parents=True, exist_ok=True)
-            file_path = upload_dir / stored_filename
+            chunk_dir = self._chunk_upload_dir()
+            self._cleanup_upload_sessions(chunk_dir)
+            
+            token = uuid.uuid4().hex
+            (chunk_dir / f"{token}.part").touch()
+            with open(chunk_dir / f"{token}.json", 'w', encoding='utf-8') as f:
+                json.dump({
+                    'user_id': user_id,
+                    'filename': filename,
+                    'original_filename': original_filename,
+                    'total_size': total_size
+                }, f, ensure_ascii=False)
+                
+            return {
+                'success': True,
+                'message': '上传会话创建成功',
+                'token': token,
+                'offset': 0,
+                'total_size': total_size
+            }
             
-            with open(file_path, 'wb') as f:
-                f.write(file_data)
+        except Exception as e:
+            self.logger.error(f"创建上传会话失败: {e}")
+            return {'success': False, 'message': f'创建上传会话失败: {str(e)}', 'code': 500}
+            
+    async def get_upload_offset(self, token: str, user_id: int) -> Dict[str, Any]:
+        """查询分块上传会话已写入的偏移量，用于断点续传"""
+        session = self._load_upload_session(token, user_id)
+        if session is None:
+            return {'success': False, 'message': '上传会话不存在', 'code': 404}
+        part_path = self._chunk_upload_dir() / f"{token}.part"
+        try:
+            offset = part_path.stat().st_size
+        except FileNotFoundError:
+            # 上传刚完成或会话正在被清理，分块文件已不存在而会话文件尚未删除
+            return {'success': False, 'message': '上传会话不存在', 'code': 404}
+        return {
+            'success': True,
+            'message': '查询上传进度成功',
+            'offset': offset,
+            'total_size': session['total_size']
+        }
+        
+    async def upload_chunk(self, token: str, user_id: int, offset: int, stream, length: int) -> Dict[str, Any]:
+        """
+        写入一个上传分块，写满文件总大小时完成上传
+        
+        Args:
+            token: 上传令牌
+            user_id: 用户ID
+            offset: 分块在文件中的起始偏移量，必须等于已写入的大小
+            stream: 请求体流
+            length: 分块大小（字节）
+            
+        Returns:
+            写入结果，包含新的偏移量；上传完成时包含文件ID
+        """
+        try:
+            session = self._load_upload_session(token, user_id)
+            if session is None:
+                return {'success': False, 'message': '上传会话不存在', 'code': 404}
+            if offset + length > session['total_size']:
+                return {'success': False, 'message': '分块超出文件总大小', 'code': 400}
                 
-            # 保存文件信息到数据库
-            # 使用原始文件名作为显示名称，如果没有则使用处理后的文件名
-            display_name = original_filename if original_filename else filename
-            file_record = await self._save_file_record(
-                user_id=user_id,
-                original_name=display_name,
-                stored_name=stored_filename,
-                file_path=str(file_path),
-                file_size=len(file_data),
-                file_hash=file_hash
-            )
+            file_storage_config = self.configs.get('config', {}).get('file_storage', {})
+            chunk_size = int(file_storage_config.get('write_chunk_size', 1024)) * 1024
+            part_path = self._chunk_upload_dir() / f"{token}.part"
             
-            if file_record:
-                # 异步启动文件处理任务
-                await self._start_file_processing(file_record['id'])
+            try:
+                loop = asyncio.get_running_loop()
+                current_size, written = await loop.run_in_executor(
+                    None, _write_chunk, part_path, stream, offset, length, chunk_size
+                )
+            except BlockingIOError:
+                return {'success': False, 'message': '该上传会话正在写入', 'code': 409}
                 
+            if current_size != offset:
                 return {
-                    'success': True,
-                    'message': '文件上传成功',
-                    'file_id': file_record['id'],
-                    'filename': filename,
-                    'size': len(file_data)
+                    'success': False,
+                    'message': '分块偏移量与已上传大小不一致',
+                    'code': 409,
+                    'offset': current_size
                 }
-            else:
-                # 删除已保存的文件
-                file_path.unlink(missing_ok=True)
+                
+            new_offset = offset + written
+            if new_offset < session['total_size']:
                 return {
-                    'success': False,
-                    'message': '文件记录保存失败',
-                    'file_id': None
+                    'success': True,
+                    'message': '分块上传成功',
+                    'completed': False,
+                    'offset': new_offset
                 }
                 
+            result = await self.finalize_upload(token, user_id, session)
+            result['completed'] = True
+            result['offset'] = new_offset
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"分块上传失败: {e}")
+            return {'success': False, 'message': f'分块上传失败: {str(e)}', 'code': 500}
+            
+    async def finalize_upload(self, token: str, user_id: int, session: Dict[str, Any] = None) -> Dict[str, Any]:
+        """完成分块上传：将临时文件移动到上传目录，校验后保存文件记录"""
+        if session is None:
+            session = self._load_upload_session(token, user_id)
+            if session is None:
+                return {'success': False, 'message': '上传会话不存在', 'code': 404}
+                
+        chunk_dir = self._chunk_upload_dir()
+        filename = session['filename']
+        file_path = chunk_dir.parent / f"{uuid.uuid4().hex}{Path(filename).suffix.lower()}"
+        try:
+            # 同一文件系统内原子移动，不复制文件内容
+            os.replace(chunk_dir / f"{token}.part", file_path)
+        except FileNotFoundError:
+            return {'success': False, 'message': '上传会话不存在', 'code': 404}
+        (chunk_dir / f"{token}.json").unlink(missing_ok=True)
+        
+        try:
+            loop = asyncio.get_running_loop()
+            file_hash = await loop.run_in_executor(None, _hash_file, file_path)
+            return await self._accept_upload(file_path, filename, user_id, session.get('original_filename'),
+                                             session['total_size'], file_hash)
         except Exception as e:
             self.logger.error(f"文件上传失败: {e}")
+            file_path.unlink(missing_ok=True)
             return {
                 'success': False,
                 'message': f'文件上传失败: {str(e)}',
                 'file_id': None
             }
             
-    def _validate_file(self, file_data: bytes, filename: str) -> Dict[str, Any]:
-        """验证文件"""
+    async def _accept_upload(self, file_path: Path, filename: str, user_id: int, original_filename: Optional[str],
+                             file_size: int, file_hash: str) -> Dict[str, Any]:
+        """校验已写入磁盘的上传文件并去重，通过后保存记录；未通过时删除文件"""
+        # 验证文件（PDF格式直接从磁盘打开校验，在线程池中执行，不阻塞事件循环）
+        stored_path = str(file_path)
+        loop = asyncio.get_running_loop()
+        validation_result = await loop.run_in_executor(
+            None, self._validate_upload, filename, file_size, lambda: fitz.open(stored_path, filetype="pdf")
+        )
+        if not validation_result['valid']:
+            file_path.unlink(missing_ok=True)
+            return {
+                'success': False,
+                'message': validation_result['message'],
+                'file_id': None
+            }
+            
+        # 检查文件是否已存在
+        existing_file = await self._check_file_exists(file_hash, user_id)
+        if existing_file:
+            file_path.unlink(missing_ok=True)
+            return {
+                'success': False,
+                'message': '文件已存在',
+                'file_id': existing_file['id']
+            }
+            
+        return await self._register_upload(file_path, filename, user_id, original_filename,
+                                           file_size, file_hash)
+        
+    async def _register_upload(self, file_path: Path, filename: str, user_id: int, original_filename: Optional[str],
+                               file_size: int, file_hash: str) -> Dict[str, Any]:
+        """保存已写入磁盘的上传文件记录并启动处理任务，记录保存失败时删除文件"""
+        # 使用原始文件名作为显示名称，如果没有则使用处理后的文件名
+        display_name = original_filename if original_filename else filename
+        file_record = await self._save_file_record(
+            user_id=user_id,
+            original_name=display_name,
+            stored_name=file_path.name,
+            file_path=str(file_path),
+            file_size=file_size,
+            file_hash=file_hash
+        )
+        
+        if file_record:
+            # 异步启动文件处理任务
+            await self._start_file_processing(file_record['id'])
+            
+            return {
+                'success': True,
+                'message': '文件上传成功',
+                'file_id': file_record['id'],
+                'filename': filename,
+                'size': file_size
+            }
+        else:
+            # 删除已保存的文件
+            file_path.unlink(missing_ok=True)
+            return {
+                'success': False,
+                'message': '文件记录保存失败',
+                'file_id': None
+            }
+            
+    def _validate_upload(self, filename: str, file_size: int, open_pdf) -> Dict[str, Any]:
+        """
+        验证上传文件
+        
+        Args:
+            filename: 文件名
+            file_size: 文件大小（字节）
+            open_pdf: 打开PDF文档的函数（从内存或磁盘）
+        """
         try:
             # 检查文件扩展名
             file_extension = Path(filename).suffix.lower()
@@ -249,16 +675,16 @@ class FileService:
                 
             # 检查文件大小
             max_size = file_storage_config.get('max_file_size', 100) * 1024 * 1024  # MB转字节
-            if len(file_data) > max_size:
+            if file_size > max_size:
                 return {
                     'valid': False,
-                    'message': f'文件大小超出限制: {len(file_data) / 1024 / 1024:.2f}MB'
+                    'message': f'文件大小超出限制: {file_size / 1024 / 1024:.2f}MB'
                 }
                 
             # 检查PDF文件格式
             if file_extension == '.pdf':
                 try:
-                    doc = fitz.open(stream=file_data, filetype="pdf")
+                    doc = open_pdf()
                     if doc.page_count == 0:
                         return {
                             'valid': False,
@@ -300,6 +726,46 @@ class FileService:
             self.logger.error(f"检查文件是否存在失败: {e}")
             return None
             
+    async def _write_upload_stream(self, file_path: Path, stream, max_size: int) -> Tuple[str, int]:
+        """
+        将文件流分块写入磁盘，同时计算MD5
+        超过大小上限时停止写入，返回的大小大于上限，由调用方按超限处理
+        
+        Returns:
+            (文件哈希, 文件大小)
+        """
+        file_storage_config = self.configs.get('config', {}).get('file_storage', {})
+        upload_io = file_storage_config.get('upload_io', 'aiofiles')
+        chunk_size = int(file_storage_config.get('write_chunk_size', 1024)) * 1024
+        
+        # 上传内容已落盘（Werkzeug超过500KB时写入临时文件）时，由内核直接复制到目标文件
+        source_fd = _disk_fileno(stream) if upload_io in ('auto', 'kernel_copy') else None
+        if source_fd is not None and hasattr(os, 'copy_file_range'):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, _copy_upload_fd, source_fd, file_path, max_size
+            )
+        
+        if not (upload_io in ('auto', 'aiofiles') and AIOFILES_AVAILABLE):
+            # 同步读取、哈希和写入整体放入线程池，不阻塞事件循环
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, _copy_upload_stream, stream, file_path, max_size, chunk_size
+            )
+            
+        file_hash = hashlib.md5()
+        file_size = 0
+        async with aiofiles.open(file_path, 'wb') as f:
+            while file_size <= max_size:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                file_hash.update(chunk)
+                file_size += len(chunk)
+                await f.write(chunk)
+                
+        return file_hash.hexdigest(), file_size
+        
     async def _save_file_record(self, user_id: int, original_name: str, stored_name: str, 
                               file_path: str, file_size: int, file_hash: str) -> Optional[Dict[str, Any]]:
         """保存文件记录到数据库"""
@@ -360,33 +826,31 @@ class FileService:
                 # 这里应该调用Celery任务
                 pass
             else:
-                # 使用线程池在后台处理，避免阻塞主线程
-                import threading
-                import concurrent.futures
-                
-                def run_async_processing():
-                    """在新的事件循环中运行异步处理"""
-                    try:
-                        # 创建新的事件循环
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        
-                        # 运行文件处理
-                        loop.run_until_complete(self.process_file(file_id, task_id))
-                    except Exception as e:
-                        self.logger.error(f"后台文件处理失败: {e}")
-                    finally:
-                        loop.close()
-                
-                # 在后台线程中启动处理
-                thread = threading.Thread(target=run_async_processing, daemon=True)
-                thread.start()
+                # 使用常驻线程池在后台处理，避免阻塞主线程
+                self._get_processing_executor().submit(self._run_file_processing, file_id, task_id)
                 
             self.logger.info(f"文件处理任务已启动: file_id={file_id}, task_id={task_id}")
             
         except Exception as e:
             self.logger.error(f"启动文件处理任务失败: {e}")
             
+    def _get_processing_executor(self) -> ThreadPoolExecutor:
+        """获取文件处理线程池，并发数由 content_processing.max_workers 配置"""
+        if self._processing_executor is None:
+            processing_config = self.configs.get('config', {}).get('content_processing', {})
+            self._processing_executor = ThreadPoolExecutor(
+                max_workers=int(processing_config.get('max_workers', 4)),
+                thread_name_prefix="file-process"
+            )
+        return self._processing_executor
+        
+    def _run_file_processing(self, file_id: int, task_id: str):
+        """在处理线程的常驻事件循环中运行文件处理，不再为每个文件创建和销毁事件循环"""
+        try:
+            run_async(self.process_file(file_id, task_id))
+        except Exception as e:
+            self.logger.error(f"后台文件处理失败: {e}")
+            
     async def process_file(self, file_id: int, task_id: str):
         """处理文件内容提取"""
         try:
@@ -973,8 +1437,24 @@ class FileService:
                     WHERE id = %s
                     """
                     cursor.execute(sql, (status, progress, datetime.now(), file_id))
+                    
+                # 开始处理、处理完成或失败时，缓存的文件列表和文件信息中的处理状态已过期；
+                # 处理中的进度更新频繁，不逐次清除缓存，由进度推送和缓存过期体现
+                user_id = None
+                if status != 'processing' or progress == 0:
+                    cursor.execute("SELECT user_id FROM files WHERE id = %s", (file_id,))
+                    row = cursor.fetchone()
+                    user_id = row['user_id'] if row else None
                 
             connection.close()
+            if user_id is not None:
+                self.response_cache.invalidate(file_cache_scope(user_id))
+            
+            # 推送状态变化给订阅的客户端
+            state = {'file_id': file_id, 'process_status': status, 'process_progress': progress}
+            if content_extracted is not None:
+                state['content_extracted'] = bool(content_extracted)
+            self.progress.publish(file_id, state)
             
         except Exception as e:
             self.logger.error(f"更新文件状态失败: {e}")
@@ -1008,8 +1488,43 @@ class FileService:
             self.logger.error(f"获取文件信息失败: {e}")
             return None
             
-    async def get_file_list(self, user_id: int, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
-        """获取文件列表"""
+    async def get_owned_file_info(self, file_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        获取属于指定用户的文件信息（只包含可对外展示的字段）
+        归属检查在SQL中完成，文件不存在或不属于该用户时返回None
+        """
+        try:
+            connection = self.get_db_connection()
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SELECT {FILE_LIST_COLUMNS} FROM files WHERE id = %s AND user_id = %s LIMIT 1",
+                        (file_id, user_id)
+                    )
+                    return cursor.fetchone()
+            finally:
+                connection.close()
+                
+        except Exception as e:
+            self.logger.error(f"获取文件信息失败: {e}")
+            return None
+            
+    async def get_file_list(self, user_id: int, page: int = 1, page_size: int = 20,
+                            cursor: Optional[int] = None) -> Dict[str, Any]:
+        """
+        获取文件列表
+        
+        Args:
+            user_id: 用户ID
+            page: 页码（页码分页）
+            page_size: 每页大小
+            cursor: 游标分页位置，上一页最后一个文件的ID；传入时使用游标分页，0表示第一页
+            
+        两种分页方式均按ID倒序（即上传顺序倒序），切换分页方式时结果顺序一致
+        """
+        if cursor is not None:
+            return await self._get_file_list_after(user_id, cursor, page_size)
+            
         try:
             offset = (page - 1) * page_size
             
@@ -1026,28 +1541,14 @@ class FileService:
                        process_progress, content_extracted, indexed, created_at, updated_at
                 FROM files 
                 WHERE user_id = %s 
-                ORDER BY created_at DESC 
+                ORDER BY id DESC 
                 LIMIT %s OFFSET %s
                 """
                 cursor.execute(list_sql, (user_id, page_size, offset))
                 raw_files = cursor.fetchall()
                 
                 # 格式化文件数据
-                files = []
-                for file_info in raw_files:
-                    formatted_file = {
-                        'id': file_info['id'],
-                        'original_name': file_info['original_name'],
-                        'file_size': file_info['file_size'],
-                        'upload_status': file_info['upload_status'],
-                        'process_status': file_info['process_status'],
-                        'process_progress': file_info['process_progress'],
-                        'content_extracted': bool(file_info['content_extracted']),
-                        'indexed': bool(file_info['indexed']),
-                        'created_at': file_info['created_at'].isoformat() if file_info['created_at'] else None,
-                        'updated_at': file_info['updated_at'].isoformat() if file_info['updated_at'] else None
-                    }
-                    files.append(formatted_file)
+                files = [self._format_file(file_info) for file_info in raw_files]
                 
             connection.close()
             
@@ -1072,52 +1573,100 @@ class FileService:
                 'data': None
             }
     
+    async def _get_file_list_after(self, user_id: int, cursor: int, page_size: int) -> Dict[str, Any]:
+        """
+        游标分页获取文件列表
+        按ID倒序，每页都是 (user_id, id) 索引上的一次范围扫描，查询代价与翻页深度无关
+        """
+        try:
+            connection = self.get_db_connection()
+            try:
+                with connection.cursor() as cursor_:
+                    # 多取一条用于判断是否还有下一页
+                    if cursor > 0:
+                        cursor_.execute(
+                            f"SELECT {FILE_LIST_COLUMNS} FROM files "
+                            "WHERE user_id = %s AND id < %s ORDER BY id DESC LIMIT %s",
+                            (user_id, cursor, page_size + 1)
+                        )
+                    else:
+                        cursor_.execute(
+                            f"SELECT {FILE_LIST_COLUMNS} FROM files "
+                            "WHERE user_id = %s ORDER BY id DESC LIMIT %s",
+                            (user_id, page_size + 1)
+                        )
+                    raw_files = cursor_.fetchall()
+            finally:
+                connection.close()
+                
+            has_more = len(raw_files) > page_size
+            files = [self._format_file(file_info) for file_info in raw_files[:page_size]]
+            
+            return {
+                'success': True,
+                'data': {
+                    'files': files,
+                    'next_cursor': files[-1]['id'] if has_more else None,
+                    'page_size': page_size
+                }
+            }
+            
+        except Exception as e:
+            self.logger.error(f"获取文件列表失败: {e}")
+            return {
+                'success': False,
+                'message': f'获取文件列表失败: {str(e)}',
+                'data': None
+            }
+            
+    @staticmethod
+    def _format_file(file_info: Dict[str, Any]) -> Dict[str, Any]:
+        """格式化文件列表项（时间字段保留datetime，由响应序列化时输出为ISO 8601字符串）"""
+        return {
+            'id': file_info['id'],
+            'original_name': file_info['original_name'],
+            'file_size': file_info['file_size'],
+            'upload_status': file_info['upload_status'],
+            'process_status': file_info['process_status'],
+            'process_progress': file_info['process_progress'],
+            'content_extracted': bool(file_info['content_extracted']),
+            'indexed': bool(file_info['indexed']),
+            'created_at': file_info['created_at'],
+            'updated_at': file_info['updated_at']
+        }
+    
     async def search_files(self, user_id: int, keyword: str, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
-        """搜索文件"""
+        """搜索文件 (按文件名全文检索；未建立全文索引或关键词过短时回退为LIKE匹配)"""
         try:
             offset = (page - 1) * page_size
-            search_pattern = f"%{keyword}%"
+            boolean_query = _fulltext_query(keyword) if self._fulltext_available else None
             
             connection = self.get_db_connection()
-            with connection.cursor() as cursor:
-                # 获取搜索结果总数
-                count_sql = """
-                SELECT COUNT(*) as total FROM files 
-                WHERE user_id = %s AND original_name LIKE %s
-                """
-                cursor.execute(count_sql, (user_id, search_pattern))
-                total = cursor.fetchone()['total']
-                
-                # 获取搜索结果列表
-                search_sql = """
-                SELECT id, original_name, file_size, upload_status, process_status, 
-                       process_progress, content_extracted, indexed, created_at, updated_at
-                FROM files 
-                WHERE user_id = %s AND original_name LIKE %s
-                ORDER BY created_at DESC 
-                LIMIT %s OFFSET %s
-                """
-                cursor.execute(search_sql, (user_id, search_pattern, page_size, offset))
-                raw_files = cursor.fetchall()
-                
-                # 格式化文件数据
-                files = []
-                for file_info in raw_files:
-                    formatted_file = {
-                        'id': file_info['id'],
-                        'original_name': file_info['original_name'],
-                        'file_size': file_info['file_size'],
-                        'upload_status': file_info['upload_status'],
-                        'process_status': file_info['process_status'],
-                        'process_progress': file_info['process_progress'],
-                        'content_extracted': bool(file_info['content_extracted']),
-                        'indexed': bool(file_info['indexed']),
-                        'created_at': file_info['created_at'].isoformat() if file_info['created_at'] else None,
-                        'updated_at': file_info['updated_at'].isoformat() if file_info['updated_at'] else None
-                    }
-                    files.append(formatted_file)
+            try:
+                with connection.cursor() as cursor:
+                    raw_files = None
+                    if boolean_query:
+                        try:
+                            total, raw_files = self._query_files(
+                                cursor, "MATCH(original_name) AGAINST(%s IN BOOLEAN MODE)", boolean_query,
+                                user_id, page_size, offset
+                            )
+                        except pymysql.MySQLError as e:
+                            if e.args[0] != ER_FT_MATCHING_KEY_NOT_FOUND:
+                                raise
+                            self._fulltext_available = False
+                            self.logger.warning("files.original_name 未建立全文索引，文件搜索回退为LIKE匹配")
+                            
+                    if raw_files is None:
+                        total, raw_files = self._query_files(
+                            cursor, "original_name LIKE %s", f"%{_escape_like(keyword)}%",
+                            user_id, page_size, offset
+                        )
+            finally:
+                connection.close()
                 
-            connection.close()
+            # 格式化文件数据
+            files = [self._format_file(file_info) for file_info in raw_files]
             
             return {
                 'success': True,
@@ -1140,6 +1689,30 @@ class FileService:
                 'data': None
             }
             
+    def _query_files(self, cursor, condition: str, condition_param: str, user_id: int,
+                     limit: int, offset: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """按条件查询用户文件的总数和当前页数据"""
+        cursor.execute(
+            f"SELECT COUNT(*) as total FROM files WHERE user_id = %s AND {condition}",
+            (user_id, condition_param)
+        )
+        total = cursor.fetchone()['total']
+        if total == 0 or offset >= total:
+            return total, []
+            
+        cursor.execute(
+            f"""
+            SELECT id, original_name, file_size, upload_status, process_status, 
+                   process_progress, content_extracted, indexed, created_at, updated_at
+            FROM files 
+            WHERE user_id = %s AND {condition}
+            ORDER BY created_at DESC 
+            LIMIT %s OFFSET %s
+            """,
+            (user_id, condition_param, limit, offset)
+        )
+        return total, cursor.fetchall()
+        
     async def delete_file(self, file_id: int, user_id: int) -> Dict[str, Any]:
         """删除文件"""
         try:
@@ -1195,6 +1768,93 @@ class FileService:
                 'message': f'删除文件失败: {str(e)}'
             }
             
+    async def delete_files_bulk(self, file_ids: List[int], user_id: int) -> List[Dict[str, Any]]:
+        """
+        批量删除文件
+        每批ID只执行一次归属查询和一次DELETE，而不是每个文件各自查询和删除；
+        归属查询按主键取出文件的所属用户，可以区分文件不存在和无权限删除
+        
+        Args:
+            file_ids: 文件ID列表
+            user_id: 用户ID
+            
+        Returns:
+            每个文件的删除结果列表，顺序与file_ids一致
+        """
+        deleted = {}
+        forbidden = set()
+        error = None
+        try:
+            connection = self.get_db_connection()
+            try:
+                with connection.cursor() as cursor:
+                    for start in range(0, len(file_ids), BULK_DELETE_CHUNK_SIZE):
+                        chunk = file_ids[start:start + BULK_DELETE_CHUNK_SIZE]
+                        placeholders = ','.join(['%s'] * len(chunk))
+                        
+                        cursor.execute(
+                            f"SELECT id, user_id, file_path FROM files WHERE id IN ({placeholders})",
+                            chunk
+                        )
+                        owned = {}
+                        for row in cursor.fetchall():
+                            if row['user_id'] == user_id:
+                                owned[row['id']] = row['file_path']
+                            else:
+                                forbidden.add(row['id'])
+                        if not owned:
+                            continue
+                            
+                        # 删除数据库记录（触发器会自动清理相关数据）
+                        owned_placeholders = ','.join(['%s'] * len(owned))
+                        cursor.execute(
+                            f"DELETE FROM files WHERE user_id = %s AND id IN ({owned_placeholders})",
+                            (user_id, *owned)
+                        )
+                        deleted.update(owned)
+            finally:
+                connection.close()
+                
+        except Exception as e:
+            self.logger.error(f"批量删除文件失败: {e}")
+            error = e
+            
+        # 删除物理文件（一次线程池调用完成所有unlink）；
+        # 后续批次出错时，之前批次的数据库记录已经删除，对应的物理文件同样需要清理
+        if deleted:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._unlink_files, list(deleted.values()))
+            self.logger.info(f"批量删除文件成功: file_ids={list(deleted)}")
+            
+        if error is not None:
+            return [
+                {
+                    'file_id': file_id,
+                    'success': file_id in deleted,
+                    'message': '文件删除成功' if file_id in deleted else f'删除文件失败: {str(error)}'
+                }
+                for file_id in file_ids
+            ]
+            
+        return [
+            {
+                'file_id': file_id,
+                'success': file_id in deleted,
+                'message': ('文件删除成功' if file_id in deleted
+                            else '无权限删除此文件' if file_id in forbidden
+                            else '文件不存在')
+            }
+            for file_id in file_ids
+        ]
+        
+    def _unlink_files(self, file_paths: List[str]):
+        """删除物理文件，单个文件删除失败不影响其他文件"""
+        for file_path in file_paths:
+            try:
+                Path(file_path).unlink(missing_ok=True)
+            except Exception as e:
+                self.logger.warning(f"物理文件删除失败: {file_path}, {e}，但数据库记录已删除")
+                
     async def rename_file(self, file_id: int, new_name: str, user_id: int) -> Dict[str, Any]:
         """重命名文件"""
         try:
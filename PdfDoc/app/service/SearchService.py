@@ -11,14 +11,22 @@ import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple, Generator
+from typing import Dict, Any, List, Optional, Tuple, Generator, AsyncGenerator
 import uuid
 import time
+import threading
 
 # 数据库相关
 import pymysql
 from pymysql.cursors import DictCursor
 
+# 数据库连接池 (可选，未安装时每次获取连接都新建)
+try:
+    from dbutils.pooled_db import PooledDB
+    DBUTILS_AVAILABLE = True
+except ImportError:
+    DBUTILS_AVAILABLE = False
+
 # 向量数据库相关
 try:
     from pymilvus import connections, Collection, utility
@@ -43,6 +51,9 @@ except ImportError:
 # HTTP请求
 import requests
 
+# 共享的Neo4j驱动
+from ..environment_check import get_neo4j_driver
+
 # 配置加载
 import yaml
 
@@ -67,6 +78,10 @@ class SearchService:
         self.neo4j_driver = None
         self.conversation_sessions = {}  # 存储对话会话
         
+        # MySQL连接池（首次获取连接时创建）
+        self._db_pool = None
+        self._db_pool_lock = threading.Lock()
+        
         self._init_components()
         
     def _setup_logger(self) -> logging.Logger:
@@ -173,12 +188,8 @@ class SearchService:
             return
             
         try:
-            neo4j_config = self.configs.get('db', {}).get('neo4j', {})
-            uri = neo4j_config.get('uri', 'bolt://localhost:7687')
-            username = neo4j_config.get('username', 'neo4j')
-            password = neo4j_config.get('password', 'password')
-            
-            self.neo4j_driver = GraphDatabase.driver(uri, auth=(username, password))
+            # 与环境检查共用同一个驱动及连接池
+            self.neo4j_driver = get_neo4j_driver(self.configs.get('db', {}).get('neo4j', {}))
             
             # 测试连接
             with self.neo4j_driver.session() as session:
@@ -189,21 +200,44 @@ class SearchService:
         except Exception as e:
             self.logger.error(f"Neo4j连接失败: {e}")
             
+    def _get_db_pool(self, connect_args: Dict[str, Any]) -> "PooledDB":
+        """获取MySQL连接池，首次调用时按 db.connection_pool 配置创建"""
+        if self._db_pool is None:
+            with self._db_pool_lock:
+                if self._db_pool is None:
+                    pool_config = self.configs.get('db', {}).get('connection_pool') or {}
+                    max_connections = int(pool_config.get('max_connections', 20))
+                    self._db_pool = PooledDB(
+                        creator=pymysql,
+                        mincached=int(pool_config.get('min_connections', 5)),
+                        maxcached=max_connections,
+                        maxconnections=max_connections,
+                        blocking=True,
+                        **connect_args
+                    )
+        return self._db_pool
+        
     def get_db_connection(self):
-        """获取数据库连接"""
+        """
+        获取数据库连接
+        
+        安装DBUtils时从连接池取出连接，调用方 close() 时归还连接池而不断开，不再每次请求都重新握手认证
+        """
         try:
             db_config = self.configs.get('db', {}).get('mysql', {})
-            connection = pymysql.connect(
-                host=db_config.get('host', 'localhost'),
-                port=db_config.get('port', 3306),
-                user=db_config.get('username', 'root'),
-                password=db_config.get('password', ''),
-                database=db_config.get('database', 'pdf_ai_doc'),
-                charset=db_config.get('charset', 'utf8mb4'),
-                cursorclass=DictCursor,
-                autocommit=True
-            )
-            return connection
+            connect_args = {
+                'host': db_config.get('host', 'localhost'),
+                'port': db_config.get('port', 3306),
+                'user': db_config.get('username', 'root'),
+                'password': db_config.get('password', ''),
+                'database': db_config.get('database', 'pdf_ai_doc'),
+                'charset': db_config.get('charset', 'utf8mb4'),
+                'cursorclass': DictCursor,
+                'autocommit': True
+            }
+            if DBUTILS_AVAILABLE:
+                return self._get_db_pool(connect_args).connection()
+            return pymysql.connect(**connect_args)
         except Exception as e:
             self.logger.error(f"数据库连接失败: {e}")
             raise
@@ -313,6 +347,62 @@ class SearchService:
                 'message': f'智能检索失败: {str(e)}'
             }
             
+    async def stream_search_and_answer(self, session_id: int, user_id: int, query: str,
+                                       file_ids: List[int] = None) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        智能检索并流式返回回答
+        
+        检索流程与 search_and_answer 相同，回答内容随大语言模型的生成逐段产出，不等待完整回答；
+        产出的事件类型为 content / sources / error，回答结束后保存助手消息和搜索历史；
+        回答生成中途失败时产出 error 事件，不保存不完整的回答
+        """
+        try:
+            start_time = time.time()
+            
+            # 验证会话权限
+            session_valid = await self._validate_session(session_id, user_id)
+            if not session_valid:
+                yield {'type': 'error', 'message': '会话不存在或无权限访问'}
+                return
+                
+            # 记录用户消息
+            await self._save_chat_message(session_id, 'user', query, file_ids)
+            
+            # 优化查询词、多模态检索、GraphRAG增强
+            optimized_queries = await self._optimize_search_query(query)
+            search_results = await self._multi_modal_search(query, optimized_queries, file_ids, user_id)
+            enhanced_results = await self._graph_rag_enhancement(query, search_results, file_ids)
+            
+            # 流式生成回答
+            prompt = await self._build_answer_prompt(query, enhanced_results, session_id)
+            answer_parts = []
+            for delta in self._stream_llm(prompt):
+                answer_parts.append(delta)
+                yield {'type': 'content', 'content': delta}
+                
+            answer_content = ''.join(answer_parts)
+            if not answer_content:
+                # 如果LLM不可用，生成简单回答
+                answer_content = self._generate_simple_answer(query, enhanced_results['search_results'])
+                yield {'type': 'content', 'content': answer_content}
+                
+            # 发送来源信息
+            sources = self._extract_sources(enhanced_results['search_results'])
+            if sources:
+                yield {'type': 'sources', 'sources': sources}
+                
+            # 记录响应时间，保存助手回答和搜索历史
+            response_time = time.time() - start_time
+            await self._save_chat_message(
+                session_id, 'assistant', answer_content,
+                file_ids, search_results, sources, response_time
+            )
+            await self._save_search_history(user_id, query, 'semantic', file_ids, len(search_results), response_time)
+            
+        except Exception:
+            self.logger.exception("流式智能检索失败")
+            yield {'type': 'error', 'message': '智能检索失败，请稍后重试'}
+            
     async def _validate_session(self, session_id: int, user_id: int) -> bool:
         """验证会话权限"""
         try:
@@ -718,31 +808,36 @@ class SearchService:
             self.logger.error(f"构建上下文图失败: {e}")
             return {'nodes': [], 'edges': [], 'node_count': 0, 'edge_count': 0}
             
+    async def _build_answer_prompt(self, query: str, enhanced_results: Dict[str, Any], 
+                                   session_id: int) -> str:
+        """构建回答提示词（有对话历史时使用多轮对话模板）"""
+        # 获取对话历史
+        conversation_history = await self._get_conversation_history(session_id)
+        
+        prompt_config = self.configs.get('prompt', {}).get('search_prompts', {})
+        
+        if conversation_history:
+            # 多轮对话
+            prompt_template = prompt_config.get('multi_turn_context', '')
+            return prompt_template.format(
+                conversation_history=self._format_conversation_history(conversation_history),
+                current_question=query,
+                search_results=self._format_search_results(enhanced_results['search_results'])
+            )
+            
+        # 单轮问答
+        prompt_template = prompt_config.get('qa_search', '')
+        return prompt_template.format(
+            question=query,
+            search_results=self._format_search_results(enhanced_results['search_results'])
+        )
+        
     async def _generate_answer(self, query: str, enhanced_results: Dict[str, Any], 
                              session_id: int) -> Dict[str, Any]:
         """生成回答"""
         try:
-            # 获取对话历史
-            conversation_history = await self._get_conversation_history(session_id)
-            
             # 构建提示词
-            prompt_config = self.configs.get('prompt', {}).get('search_prompts', {})
-            
-            if conversation_history:
-                # 多轮对话
-                prompt_template = prompt_config.get('multi_turn_context', '')
-                prompt = prompt_template.format(
-                    conversation_history=self._format_conversation_history(conversation_history),
-                    current_question=query,
-                    search_results=self._format_search_results(enhanced_results['search_results'])
-                )
-            else:
-                # 单轮问答
-                prompt_template = prompt_config.get('qa_search', '')
-                prompt = prompt_template.format(
-                    question=query,
-                    search_results=self._format_search_results(enhanced_results['search_results'])
-                )
+            prompt = await self._build_answer_prompt(query, enhanced_results, session_id)
                 
             # 调用LLM生成回答
             answer_content = await self._call_llm(prompt)
@@ -770,23 +865,23 @@ class SearchService:
                 'entities_count': 0
             }
             
-    async def _call_llm(self, prompt: str) -> str:
-        """调用大语言模型"""
-        try:
-            llm_config = self.configs.get('model', {}).get('llm', {})
-            api_key = llm_config.get('api_key')
-            base_url = llm_config.get('base_url')
-            model_name = llm_config.get('model_name', 'deepseek-chat')
+    def _llm_request(self, prompt: str, stream: bool = False) -> Optional[Dict[str, Any]]:
+        """构建大语言模型请求参数，未配置API时返回None"""
+        llm_config = self.configs.get('model', {}).get('llm', {})
+        api_key = llm_config.get('api_key')
+        base_url = llm_config.get('base_url')
+        model_name = llm_config.get('model_name', 'deepseek-chat')
+        
+        if not api_key or not base_url:
+            return None
             
-            if not api_key or not base_url:
-                return ""
-                
-            headers = {
+        return {
+            'url': f"{base_url}/chat/completions",
+            'headers': {
                 'Authorization': f'Bearer {api_key}',
                 'Content-Type': 'application/json'
-            }
-            
-            data = {
+            },
+            'json': {
                 "model": model_name,
                 "messages": [
                     {"role": "system", "content": self.configs.get('prompt', {}).get('system_prompts', {}).get('search_assistant', '')},
@@ -794,15 +889,18 @@ class SearchService:
                 ],
                 "max_tokens": llm_config.get('max_tokens', 4096),
                 "temperature": llm_config.get('temperature', 0.7),
-                "stream": False
+                "stream": stream
             }
-            
-            response = requests.post(
-                f"{base_url}/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
+        }
+        
+    async def _call_llm(self, prompt: str) -> str:
+        """调用大语言模型"""
+        try:
+            request_args = self._llm_request(prompt)
+            if request_args is None:
+                return ""
+                
+            response = requests.post(**request_args, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -815,6 +913,42 @@ class SearchService:
             self.logger.error(f"调用LLM失败: {e}")
             return ""
             
+    def _stream_llm(self, prompt: str) -> Generator[str, None, None]:
+        """
+        流式调用大语言模型，按接口返回的增量逐段产出回答内容
+        
+        未配置API或尚未产出内容时调用失败，不产出内容，由调用方决定回退方式；
+        已产出部分内容后中断（连接断开、读取超时、数据格式错误）时抛出异常，避免调用方把不完整的回答当作完整回答
+        """
+        request_args = self._llm_request(prompt, stream=True)
+        if request_args is None:
+            return
+            
+        produced = False
+        try:
+            with requests.post(**request_args, timeout=30, stream=True) as response:
+                if response.status_code != 200:
+                    self.logger.error(f"LLM调用失败: {response.status_code}")
+                    return
+                    
+                # OpenAI兼容的SSE格式：每行 "data: {...}"，以 "data: [DONE]" 结束
+                for line in response.iter_lines():
+                    if not line.startswith(b'data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == b'[DONE]':
+                        break
+                    choices = json.loads(data).get('choices') or [{}]
+                    delta = choices[0].get('delta', {}).get('content')
+                    if delta:
+                        produced = True
+                        yield delta
+                        
+        except Exception as e:
+            if produced:
+                raise
+            self.logger.error(f"流式调用LLM失败: {e}")
+            
     def _generate_simple_answer(self, query: str, search_results: List[Dict[str, Any]]) -> str:
         """生成简单回答（当LLM不可用时）"""
         if not search_results:
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步执行工具模块
+在同步的Flask路由中执行服务层协程，每个工作线程复用一个常驻事件循环
+"""
+
+import atexit
+import asyncio
+import threading
+from typing import Any, Awaitable, AsyncIterator, Iterator
+
+# uvloop事件循环 (可选，随uvicorn[standard]安装；未安装时使用标准asyncio事件循环)
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+_new_event_loop = uvloop.new_event_loop if UVLOOP_AVAILABLE else asyncio.new_event_loop
+
+# 每个工作线程持有自己的事件循环
+_local = threading.local()
+
+# 已创建的事件循环，进程退出时统一关闭
+_loops = []
+_loops_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """获取当前线程的常驻事件循环，首次调用时创建"""
+    loop = getattr(_local, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = _new_event_loop()
+        _local.loop = loop
+        with _loops_lock:
+            _loops.append(loop)
+    return loop
+
+
+def run_async(coro: Awaitable) -> Any:
+    """
+    在当前线程的常驻事件循环中执行协程并返回结果
+
+    与 asyncio.run 不同，事件循环在请求之间保留，不再为每个请求创建和销毁；
+    服务层协程内部仍包含阻塞调用，因此每个工作线程使用独立的事件循环，避免请求之间互相阻塞
+    """
+    return get_event_loop().run_until_complete(coro)
+
+
+def iterate_async(agen: AsyncIterator) -> Iterator:
+    """
+    在当前线程的常驻事件循环中逐项迭代异步生成器，供同步的流式响应生成器使用
+
+    迭代提前结束（如客户端断开连接）时关闭异步生成器，使其中的清理逻辑得到执行
+    """
+    try:
+        while True:
+            try:
+                item = run_async(agen.__anext__())
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        run_async(agen.aclose())
+
+
+@atexit.register
+def _close_loops():
+    """进程退出时关闭所有事件循环"""
+    with _loops_lock:
+        for loop in _loops:
+            if not loop.is_closed() and not loop.is_running():
+                loop.close()
+        _loops.clear()
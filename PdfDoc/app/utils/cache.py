@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接口响应缓存模块
+将接口的JSON响应体缓存在Redis中，重复的查询请求不再访问数据库
+"""
+
+import time
+from typing import Dict, Any, Optional
+
+from .redis_client import RedisConnector, RedisError
+
+# 缓存键前缀
+CACHE_KEY_PREFIX = "api:cache"
+
+
+class ResponseCache:
+    """
+    接口响应缓存
+
+    同一作用域（如某个用户的文件数据）的缓存项保存在一个Redis哈希中：
+    - 读取只需一次 HGET，每个缓存项自带写入时间，按各自的TTL判断是否过期
+    - 数据变更时删除整个哈希即可让该作用域下的所有缓存失效，无需 KEYS/SCAN
+    """
+
+    def __init__(self, redis_config: Dict[str, Any], settings: Dict[str, Any] = None):
+        self.settings = settings or {}
+        self.scope_ttl = int(self.settings.get('scope_ttl', 300))
+        self._redis = RedisConnector(redis_config, '接口缓存', self.settings.get('enabled', True), max_connections=32)
+
+    def get(self, scope: str, field: str, ttl: float) -> Optional[bytes]:
+        """读取缓存的响应体，不存在或已超过ttl时返回None"""
+        client = self._redis.get_client()
+        if client is None:
+            return None
+        try:
+            value = client.hget(f"{CACHE_KEY_PREFIX}:{scope}", field)
+        except RedisError as e:
+            self._redis.mark_unavailable(e)
+            return None
+
+        if value is None:
+            return None
+        written_at, _, body = value.partition(b'|')
+        if time.time() - float(written_at) >= ttl:
+            return None
+        return body
+
+    def set(self, scope: str, field: str, body: bytes):
+        """写入响应体缓存"""
+        client = self._redis.get_client()
+        if client is None:
+            return
+        key = f"{CACHE_KEY_PREFIX}:{scope}"
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hset(key, field, b'%.3f|' % time.time() + body)
+            pipe.expire(key, self.scope_ttl)
+            pipe.execute()
+        except RedisError as e:
+            self._redis.mark_unavailable(e)
+
+    def invalidate(self, *scopes: str):
+        """使指定作用域下的所有缓存失效"""
+        client = self._redis.get_client()
+        if client is None or not scopes:
+            return
+        try:
+            client.delete(*[f"{CACHE_KEY_PREFIX}:{scope}" for scope in scopes])
+        except RedisError as e:
+            self._redis.mark_unavailable(e)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接口限流模块
+按用户限制请求频率和同时进行的请求数量，计数保存在Redis中，多个工作进程共享
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Any
+
+from .redis_client import RedisConnector, RedisError
+
+# 限流键前缀
+LIMIT_KEY_PREFIX = "api:limit"
+
+# 并发计数的过期时间（秒），进程异常退出未释放时计数在此时间后自动清除
+ACTIVE_KEY_TTL = 600
+
+
+class UserLimiter:
+    """
+    用户级限流器
+
+    - 频率限制：固定时间窗口计数（INCR + EXPIRE），每个窗口内超过上限的请求被拒绝
+    - 并发限制：进行中的请求计数，超过上限时拒绝，请求结束后释放
+    Redis不可用时不限流，避免限流组件故障导致接口不可用
+    """
+
+    def __init__(self, redis_config: Dict[str, Any], settings: Dict[str, Any] = None):
+        self.settings = settings or {}
+        self.window = int(self.settings.get('window', 60))
+        self._redis = RedisConnector(redis_config, '接口限流', self.settings.get('enabled', True), max_connections=32)
+
+    def allow(self, scope: str, user_id: int) -> bool:
+        """检查并计入一次请求，超过 <scope>_per_window 配置的频率上限时返回False"""
+        limit = self.settings.get(f"{scope}_per_window")
+        client = self._redis.get_client()
+        if client is None or not limit:
+            return True
+        window_id = int(time.time()) // self.window
+        key = f"{LIMIT_KEY_PREFIX}:rate:{scope}:{user_id}:{window_id}"
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.incr(key)
+            pipe.expire(key, self.window)
+            count, _ = pipe.execute()
+        except RedisError as e:
+            self._redis.mark_unavailable(e)
+            return True
+        return count <= int(limit)
+
+    def retry_after(self) -> int:
+        """距离当前时间窗口结束的秒数"""
+        return self.window - int(time.time()) % self.window
+
+    @contextmanager
+    def slot(self, scope: str, user_id: int):
+        """
+        占用一个并发名额，超过 <scope>_concurrency 配置的上限时返回False
+
+        用法: with limiter.slot('upload', user_id) as acquired: ...
+        """
+        limit = self.settings.get(f"{scope}_concurrency")
+        client = self._redis.get_client()
+        if client is None or not limit:
+            yield True
+            return
+
+        key = f"{LIMIT_KEY_PREFIX}:active:{scope}:{user_id}"
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.incr(key)
+            pipe.expire(key, ACTIVE_KEY_TTL)
+            count, _ = pipe.execute()
+        except RedisError as e:
+            self._redis.mark_unavailable(e)
+            yield True
+            return
+
+        try:
+            yield count <= int(limit)
+        finally:
+            try:
+                client.decr(key)
+            except RedisError as e:
+                self._redis.mark_unavailable(e)
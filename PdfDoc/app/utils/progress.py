@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件处理进度推送模块
+处理任务通过Redis发布/订阅推送状态变化，客户端经SSE接收，不再轮询状态接口
+"""
+
+from typing import Dict, Any, Optional
+
+from .redis_client import RedisConnector, RedisError
+
+# JSON序列化加速 (可选)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    import json
+    ORJSON_AVAILABLE = False
+
+# 进度频道前缀
+PROGRESS_CHANNEL_PREFIX = "file:progress"
+
+
+def progress_channel(file_id: int) -> str:
+    """文件处理进度频道名"""
+    return f"{PROGRESS_CHANNEL_PREFIX}:{file_id}"
+
+
+def dumps_state(state: Dict[str, Any]) -> bytes:
+    """序列化进度状态"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(state)
+    return json.dumps(state, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads_state(data: bytes) -> Dict[str, Any]:
+    """反序列化进度状态"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class ProgressChannel:
+    """
+    文件处理进度频道
+
+    发布端在处理任务更新状态时调用 publish，订阅端为每个SSE连接调用 subscribe 获得独立的订阅连接；
+    Redis不可用时发布静默跳过，订阅返回None，由调用方退回轮询
+    """
+
+    def __init__(self, redis_config: Dict[str, Any]):
+        # 发布在文件处理线程中同步执行，使用默认的读写超时，Redis无响应时不阻塞处理任务
+        self._publisher = RedisConnector(redis_config, '进度推送')
+        # 订阅连接长期保持，不设置读取超时，由 get_message 的timeout控制
+        self._subscriber = RedisConnector(redis_config, '进度订阅', socket_timeout=None, health_check_interval=30)
+
+    def publish(self, file_id: int, state: Dict[str, Any]):
+        """发布文件处理状态"""
+        client = self._publisher.get_client()
+        if client is None:
+            return
+        try:
+            client.publish(progress_channel(file_id), dumps_state(state))
+        except RedisError as e:
+            self._publisher.mark_unavailable(e)
+
+    def subscribe(self, file_id: int) -> Optional["redis.client.PubSub"]:
+        """订阅文件处理状态，返回的订阅对象由调用方负责关闭"""
+        client = self._subscriber.get_client()
+        if client is None:
+            return None
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(progress_channel(file_id))
+        except RedisError as e:
+            pubsub.close()
+            self._subscriber.mark_unavailable(e)
+            return None
+        return pubsub
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Redis客户端模块
+接口缓存、接口限流和进度推送共用的Redis连接与故障退避，统一连接超时和退避时间
+"""
+
+import time
+import logging
+from typing import Dict, Any, Optional
+
+try:
+    import redis
+    from redis import RedisError
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+    class RedisError(Exception):
+        """未安装redis时的占位异常类型"""
+
+logger = logging.getLogger(__name__)
+
+# Redis不可用时暂停访问的时间（秒），避免每个请求都等待连接超时
+UNAVAILABLE_BACKOFF = 30
+
+# 连接和读写超时（秒），请求路径上的Redis访问失败时快速放弃
+SOCKET_TIMEOUT = 0.5
+
+
+class RedisConnector:
+    """
+    按需创建的Redis客户端
+
+    访问失败后进入退避期，退避期内 get_client 返回None，调用方跳过Redis相关功能；
+    未安装redis或未启用时同样返回None
+    """
+
+    def __init__(self, redis_config: Dict[str, Any], label: str, enabled: bool = True, **client_options):
+        """
+        Args:
+            redis_config: Redis连接配置 (host/port/password/db)
+            label: 使用方名称，用于日志
+            enabled: 是否启用
+            client_options: 覆盖默认的客户端参数，如 socket_timeout、max_connections
+        """
+        self.enabled = REDIS_AVAILABLE and enabled
+        self.label = label
+        self._redis_config = redis_config or {}
+        self._client_options = {
+            'socket_connect_timeout': SOCKET_TIMEOUT,
+            'socket_timeout': SOCKET_TIMEOUT,
+            **client_options
+        }
+        self._client = None
+        self._unavailable_until = 0.0
+
+    def get_client(self) -> Optional["redis.Redis"]:
+        """获取Redis客户端，Redis不可用时在退避期内返回None"""
+        if not self.enabled or time.monotonic() < self._unavailable_until:
+            return None
+        if self._client is None:
+            self._client = redis.Redis(
+                host=self._redis_config.get('host', 'localhost'),
+                port=self._redis_config.get('port', 6379),
+                password=self._redis_config.get('password', None),
+                db=self._redis_config.get('db', 0),
+                **self._client_options
+            )
+        return self._client
+
+    def mark_unavailable(self, error: Exception):
+        """记录Redis访问失败，进入退避期"""
+        self._unavailable_until = time.monotonic() + UNAVAILABLE_BACKOFF
+        logger.warning(f"{self.label}暂不可用，{UNAVAILABLE_BACKOFF}s 内跳过: {error}")
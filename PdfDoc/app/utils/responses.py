@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON请求/响应工具模块
+使用orjson直接序列化为字节并构造响应，跳过jsonify的参数整理和(响应, 状态码)元组处理；
+请求体同样使用orjson解析
+"""
+
+import json
+from datetime import date
+from typing import Any
+
+from flask import current_app, request
+
+# JSON序列化加速 (可选，未安装时使用应用配置的JSON提供器)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# datetime等类型交由Flask默认的default处理，与jsonify的输出格式保持一致
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME if ORJSON_AVAILABLE else 0
+
+
+def json_body() -> Any:
+    """
+    解析JSON请求体，请求体为空或不是合法JSON时返回None
+    
+    不缓存原始请求体（get_json会在请求对象上保留一份副本），也不检查Content-Type
+    """
+    raw = request.get_data(cache=False)
+    if not raw:
+        return None
+    try:
+        return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+    except ValueError:
+        return None
+
+
+def _isoformat_default(obj: Any) -> Any:
+    """日期序列化为ISO 8601字符串，其余类型交由应用的JSON提供器处理"""
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return current_app.json.default(obj)
+
+
+def _plain_default(obj: Any) -> Any:
+    """日期序列化为ISO 8601字符串，其余类型转换为字符串 (不依赖应用上下文)"""
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps_bytes(payload: Any, iso_datetime: bool = False) -> bytes:
+    """
+    将数据序列化为JSON字节
+    
+    Args:
+        payload: 响应数据
+        iso_datetime: 日期输出为ISO 8601字符串（由序列化器直接格式化）；默认与jsonify一致输出HTTP日期格式
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS if iso_datetime else ORJSON_OPTIONS
+        return orjson.dumps(payload, default=current_app.json.default, option=option)
+    if iso_datetime:
+        return json.dumps(payload, default=_isoformat_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return current_app.json.dumps(payload).encode('utf-8')
+
+
+def json_response(payload: Any, status: int = 200, iso_datetime: bool = False):
+    """构造JSON响应"""
+    return current_app.response_class(dumps_bytes(payload, iso_datetime), status=status, mimetype='application/json')
+
+
+def precompile_json(payload: Any) -> bytes:
+    """在模块加载时预先序列化固定的响应体 (不依赖应用上下文)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, option=ORJSON_OPTIONS)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_plain(payload: Any) -> bytes:
+    """
+    紧凑序列化为JSON字节 (不依赖应用上下文，可在流式响应的生成器中调用)
+    
+    中文按UTF-8原样输出，日期输出为ISO 8601字符串
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=_plain_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_plain_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def precompiled_response(body: bytes, status: int = 200):
+    """使用预先序列化的响应体构造JSON响应"""
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+
+# 错误路径使用的别名，调用处一眼可以看出返回的是错误响应
+error_response = precompiled_response
@@ -305,6 +305,11 @@ CREATE INDEX idx_document_contents_composite ON document_contents(file_id, conte
 CREATE INDEX idx_entities_composite ON entities(file_id, entity_type, entity_name);
 CREATE INDEX idx_chat_messages_composite ON chat_messages(session_id, message_type, created_at);
 CREATE INDEX idx_task_queue_composite ON task_queue(task_status, task_type, created_at);
+-- 搜索建议按查询前缀匹配用户的搜索历史
+CREATE INDEX idx_search_history_user_query ON search_history(user_id, search_query(64));
+
+-- 文件名全文索引 (ngram分词支持中文，供文件搜索使用)
+CREATE FULLTEXT INDEX ft_files_original_name ON files(original_name) WITH PARSER ngram;
 
 -- 显示表结构信息
 SHOW TABLES;
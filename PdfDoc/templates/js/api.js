@@ -108,7 +108,6 @@ class ApiClient {
     async upload(url, file, onProgress = null) {
         const formData = new FormData();
         formData.append('file', file);
-        formData.append('user_id', Utils.CONSTANTS.USER_ID);
 
         return new Promise((resolve, reject) => {
             const xhr = new XMLHttpRequest();
@@ -169,7 +168,9 @@ const FileAPI = {
      * 上传文件
      */
     async uploadFile(file, onProgress) {
-        return apiClient.upload('/file/upload', file, onProgress);
+        // 用户ID放在查询参数中，服务端在解析请求体之前即可完成限流检查
+        const params = new URLSearchParams({ user_id: Utils.CONSTANTS.USER_ID });
+        return apiClient.upload(`/file/upload?${params}`, file, onProgress);
     },
 
     /**
@@ -298,14 +299,17 @@ const SearchAPI = {
 
         const reader = response.body.getReader();
         const decoder = new TextDecoder();
+        // 流式响应按生成进度分片到达，一行数据或一个多字节字符可能跨越两次读取
+        let buffer = '';
 
         try {
             while (true) {
                 const { done, value } = await reader.read();
                 if (done) break;
 
-                const chunk = decoder.decode(value);
-                const lines = chunk.split('\n');
+                buffer += decoder.decode(value, { stream: true });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
 
                 for (const line of lines) {
                     if (line.startsWith('data: ')) {
@@ -431,6 +435,17 @@ class RequestRetrier {
     }
 }
 
+// 推送接口地址 (由EventSource直接连接，不经过重试包装)
+const StreamAPI = {
+    /**
+     * 文件处理状态推送地址 (Server-Sent Events)
+     */
+    fileStatusUrl(fileId) {
+        const params = new URLSearchParams({ user_id: Utils.CONSTANTS.USER_ID });
+        return `${apiClient.baseURL}/file/status/${fileId}/stream?${params}`;
+    }
+};
+
 // 创建重试器实例
 const retrier = new RequestRetrier();
 
@@ -545,6 +560,7 @@ const CacheManager = {
 window.API = {
     FileAPI: ReliableAPI.FileAPI,
     SearchAPI: ReliableAPI.SearchAPI,
+    Stream: StreamAPI,
     Cache: CacheManager,
     Interceptor: RequestInterceptor
 }; 
\ No newline at end of file
@@ -390,36 +390,57 @@ class FileManager {
 
     /**
      * 监控文件处理状态
+     * 优先通过SSE接收服务端推送的状态变化，推送不可用时退回轮询状态接口
      */
-    async monitorFileProcessing(fileId) {
+    monitorFileProcessing(fileId) {
+        // 处理结束时提示并刷新列表，返回是否已结束
+        const handleStatus = (data) => {
+            if (data.process_status === 'completed') {
+                Utils.Notification.success('处理完成', '文件内容分析完成，现在可以进行智能检索了');
+                this.refreshFileList();
+                return true;
+            } else if (data.process_status === 'failed') {
+                Utils.Notification.error('处理失败', '文件内容分析失败');
+                this.refreshFileList();
+                return true;
+            }
+            return false;
+        };
+
         const checkStatus = async () => {
             try {
                 const response = await API.FileAPI.getFileStatus(fileId);
-                if (response.success) {
-                    const data = response.data;
-                    
-                    if (data.process_status === 'completed') {
-                        Utils.Notification.success('处理完成', '文件内容分析完成，现在可以进行智能检索了');
-                        this.refreshFileList();
-                        return true; // 停止监控
-                    } else if (data.process_status === 'failed') {
-                        Utils.Notification.error('处理失败', '文件内容分析失败');
-                        this.refreshFileList();
-                        return true; // 停止监控
-                    } else if (data.process_status === 'processing') {
-                        // 继续监控
-                        setTimeout(checkStatus, 3000); // 3秒后再次检查
-                    }
+                if (response.success && !handleStatus(response.data)
+                        && response.data.process_status === 'processing') {
+                    setTimeout(checkStatus, 3000); // 3秒后再次检查
                 }
             } catch (error) {
-                console.error('获取文件状态失败:', error);
                 // 停止监控
-                return true;
+                console.error('获取文件状态失败:', error);
             }
         };
 
-        // 开始监控
-        setTimeout(checkStatus, 2000); // 2秒后开始检查
+        if (typeof EventSource === 'undefined') {
+            setTimeout(checkStatus, 2000); // 2秒后开始检查
+            return;
+        }
+
+        const source = new EventSource(API.Stream.fileStatusUrl(fileId));
+        source.onmessage = (event) => {
+            try {
+                if (handleStatus(JSON.parse(event.data))) {
+                    source.close();
+                }
+            } catch (error) {
+                console.error('解析文件状态失败:', error);
+            }
+        };
+        source.onerror = () => {
+            // 连接到期断开时EventSource会自动重连；连接被拒绝（如推送不可用、连接数已满）时改为轮询
+            if (source.readyState === EventSource.CLOSED) {
+                checkStatus();
+            }
+        };
     }
 
     /**